@@ -6,7 +6,8 @@ type MealType = { id: number; name: string };
 type Recipe = { id: number; name: string; peopleAmount: number };
 
 type MealPlan = {
-  id: number;
+  id: number | null;
+  recurrenceId?: number | null;
   date: string;
   mealTypeId: number;
   recipeId: number;
@@ -36,8 +37,10 @@ export default function PlannerPage() {
   async function loadData() {
     const [mealTypesData, recipesData, plansData] = await Promise.all([
       apiRequest<MealType[]>("/meal-types"),
-      apiRequest<Recipe[]>("/recipes"),
-      apiRequest<MealPlan[]>("/meal-plans"),
+      apiRequest<Recipe[]>("/recipes/summary"),
+      apiRequest<MealPlan[]>(
+        `/meal-plans?from=${formatDate(weekDates[0])}&to=${formatDate(weekDates[weekDates.length - 1])}`
+      ),
     ]);
     setMealTypes(mealTypesData);
     setRecipes(recipesData);
@@ -102,7 +105,14 @@ export default function PlannerPage() {
                     const plan = getPlan(date, mealType.id);
                     return (
                       <div key={`${mealType.id}-${date}`} className="rounded-lg border border-slate-200 p-2">
-                        {plan ? (
+                        {plan && plan.id === null ? (
+                          <div className="space-y-1">
+                            <div className="text-sm font-medium">{plan.recipe_name}</div>
+                            <div className="text-xs text-slate-500">
+                              Repeats weekly · {plan.peopleCount} people
+                            </div>
+                          </div>
+                        ) : plan ? (
                           <div className="space-y-2">
                             <div className="text-sm font-medium">{plan.recipe_name}</div>
                             <div className="flex items-center gap-2 text-xs">
@@ -111,13 +121,13 @@ export default function PlannerPage() {
                                 type="number"
                                 min={1}
                                 value={plan.peopleCount}
-                                onChange={(event) => updatePeopleCount(plan.id, Number(event.target.value))}
+                                onChange={(event) => updatePeopleCount(plan.id!, Number(event.target.value))}
                                 className="w-16 rounded border border-slate-200 px-2 py-1"
                               />
                             </div>
                             <button
                               className="text-xs text-red-600"
-                              onClick={() => removePlan(plan.id)}
+                              onClick={() => removePlan(plan.id!)}
                             >
                               Remove
                             </button>
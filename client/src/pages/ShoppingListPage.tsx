@@ -1,5 +1,5 @@
-import { useEffect, useMemo, useState } from "react";
-import { apiRequest } from "../api/client";
+import { useEffect, useMemo, useRef, useState } from "react";
+import { API_BASE_URL, apiRequest } from "../api/client";
 
 type ShoppingItem = {
   item_key: string;
@@ -18,6 +18,12 @@ type ShoppingListResponse = {
 
 type Shop = { id: number; name: string };
 
+type ShoppingListEvent =
+  | { type: "checked"; checked: boolean; itemKeys: string[] }
+  | { type: "custom-item"; item: ShoppingItem }
+  | { type: "order"; shopId: number }
+  | { type: "refresh" };
+
 export default function ShoppingListPage() {
   const [items, setItems] = useState<ShoppingItem[]>([]);
   const [untilDate, setUntilDate] = useState<string>("");
@@ -46,10 +52,29 @@ export default function ShoppingListPage() {
     setUntilDate(data.untilDate);
   }
 
+  const reloadRef = useRef(loadShoppingList);
+  reloadRef.current = loadShoppingList;
+
   useEffect(() => {
     Promise.all([loadShops(), loadShoppingList()]);
   }, []);
 
+  useEffect(() => {
+    const source = new EventSource(`${API_BASE_URL}/shopping-list/events`);
+    source.onmessage = (message) => {
+      const event = JSON.parse(message.data) as ShoppingListEvent;
+      if (event.type === "checked") {
+        const keys = new Set(event.itemKeys);
+        setItems((prev) =>
+          prev.map((item) => (keys.has(item.item_key) ? { ...item, checked: event.checked } : item))
+        );
+      } else {
+        reloadRef.current();
+      }
+    };
+    return () => source.close();
+  }, []);
+
   async function addCustomItem(event: React.FormEvent) {
     event.preventDefault();
     if (!customName) return;
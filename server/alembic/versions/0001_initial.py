@@ -10,7 +10,7 @@ from sqlalchemy.dialects import postgresql
 
 # revision identifiers, used by Alembic.
 revision = "0001_initial"
-Down_revision = None
+down_revision = None
 branch_labels = None
 depends_on = None
 
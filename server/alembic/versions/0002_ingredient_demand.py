@@ -0,0 +1,45 @@
+"""ingredient demand
+
+Revision ID: 0002_ingredient_demand
+Revises: 0001_initial
+Create Date: 2024-01-02 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0002_ingredient_demand"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingredient_demand",
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("ingredient_id", sa.Integer(), nullable=False),
+        sa.Column("unit", sa.String(length=50), nullable=False),
+        sa.Column("quantity", sa.Numeric(), nullable=False),
+        sa.ForeignKeyConstraint(["ingredient_id"], ["ingredients.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("date", "ingredient_id", "unit"),
+    )
+    op.execute(
+        """
+        INSERT INTO ingredient_demand (date, ingredient_id, unit, quantity)
+        SELECT date, ingredient_id, unit, SUM(ROUND(portions, 30) / people_amount)
+        FROM (
+            SELECT mp.date, ri.ingredient_id, ri.unit, r.people_amount,
+                   SUM(ri.amount * mp.people_count) AS portions
+            FROM meal_plans mp
+            JOIN recipes r ON r.id = mp.recipe_id
+            JOIN recipe_ingredients ri ON ri.recipe_id = r.id
+            GROUP BY mp.date, ri.ingredient_id, ri.unit, r.people_amount
+        ) AS portions
+        GROUP BY date, ingredient_id, unit
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingredient_demand")
@@ -0,0 +1,38 @@
+"""cumulative ingredient demand
+
+Revision ID: 0003_cumulative_demand
+Revises: 0002_ingredient_demand
+Create Date: 2024-01-03 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0003_cumulative_demand"
+down_revision = "0002_ingredient_demand"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingredient_demand_cumulative",
+        sa.Column("ingredient_id", sa.Integer(), nullable=False),
+        sa.Column("unit", sa.String(length=50), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("quantity", sa.Numeric(), nullable=False),
+        sa.ForeignKeyConstraint(["ingredient_id"], ["ingredients.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("ingredient_id", "unit", "date"),
+    )
+    op.execute(
+        """
+        INSERT INTO ingredient_demand_cumulative (date, ingredient_id, unit, quantity)
+        SELECT date, ingredient_id, unit,
+               SUM(quantity) OVER (PARTITION BY ingredient_id, unit ORDER BY date)
+        FROM ingredient_demand
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingredient_demand_cumulative")
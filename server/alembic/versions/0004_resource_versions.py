@@ -0,0 +1,26 @@
+"""resource versions
+
+Revision ID: 0004_resource_versions
+Revises: 0003_cumulative_demand
+Create Date: 2024-01-04 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0004_resource_versions"
+down_revision = "0003_cumulative_demand"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "resource_versions",
+        sa.Column("name", sa.String(length=50), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("resource_versions")
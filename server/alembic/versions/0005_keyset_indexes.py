@@ -0,0 +1,25 @@
+"""keyset pagination indexes
+
+Revision ID: 0005_keyset_indexes
+Revises: 0004_resource_versions
+Create Date: 2024-01-05 00:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005_keyset_indexes"
+down_revision = "0004_resource_versions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_recipes_name_id", "recipes", ["name", "id"])
+    op.create_index("ix_ingredients_name_id", "ingredients", ["name", "id"])
+    op.create_index("ix_meal_plans_date_id", "meal_plans", ["date", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_meal_plans_date_id", table_name="meal_plans")
+    op.drop_index("ix_ingredients_name_id", table_name="ingredients")
+    op.drop_index("ix_recipes_name_id", table_name="recipes")
@@ -0,0 +1,58 @@
+"""recipe and ingredient search
+
+Revision ID: 0006_recipe_search
+Revises: 0005_keyset_indexes
+Create Date: 2024-01-06 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0006_recipe_search"
+down_revision = "0005_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column("recipes", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True))
+    op.execute(
+        """
+        UPDATE recipes SET search_vector =
+            setweight(to_tsvector('english', recipes.name), 'A')
+            || setweight(to_tsvector('english', coalesce((
+                SELECT string_agg(ingredients.name, ' ')
+                FROM ingredients
+                JOIN recipe_ingredients ON recipe_ingredients.ingredient_id = ingredients.id
+                WHERE recipe_ingredients.recipe_id = recipes.id
+            ), '')), 'B')
+            || setweight(to_tsvector('english', recipes.description), 'C')
+            || setweight(jsonb_to_tsvector('english', recipes.steps, '["string"]'), 'D')
+        """
+    )
+    op.create_index(
+        "ix_recipes_search_vector", "recipes", ["search_vector"], postgresql_using="gin"
+    )
+    op.create_index(
+        "ix_recipes_name_trgm",
+        "recipes",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_ingredients_name_trgm",
+        "ingredients",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ingredients_name_trgm", table_name="ingredients")
+    op.drop_index("ix_recipes_name_trgm", table_name="recipes")
+    op.drop_index("ix_recipes_search_vector", table_name="recipes")
+    op.drop_column("recipes", "search_vector")
@@ -0,0 +1,29 @@
+"""meal plan and foreign key indexes
+
+Revision ID: 0007_meal_plan_indexes
+Revises: 0006_recipe_search
+Create Date: 2024-01-07 00:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0007_meal_plan_indexes"
+down_revision = "0006_recipe_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_meal_plans_date_meal_type_id", "meal_plans", ["date", "meal_type_id"])
+    op.create_index("ix_meal_plans_recipe_id", "meal_plans", ["recipe_id"])
+    op.create_index("ix_meal_plans_meal_type_id", "meal_plans", ["meal_type_id"])
+    op.create_index(
+        "ix_recipe_ingredients_ingredient_id", "recipe_ingredients", ["ingredient_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recipe_ingredients_ingredient_id", table_name="recipe_ingredients")
+    op.drop_index("ix_meal_plans_meal_type_id", table_name="meal_plans")
+    op.drop_index("ix_meal_plans_recipe_id", table_name="meal_plans")
+    op.drop_index("ix_meal_plans_date_meal_type_id", table_name="meal_plans")
@@ -0,0 +1,74 @@
+"""meal plan recurrences
+
+Revision ID: 0008_meal_plan_recurrences
+Revises: 0007_meal_plan_indexes
+Create Date: 2024-01-08 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0008_meal_plan_recurrences"
+down_revision = "0007_meal_plan_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "meal_plan_recurrences",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "meal_type_id",
+            sa.Integer(),
+            sa.ForeignKey("meal_types.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "recipe_id",
+            sa.Integer(),
+            sa.ForeignKey("recipes.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("people_count", sa.Integer(), nullable=False),
+        sa.Column("weekdays", sa.SmallInteger(), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("until_date", sa.Date(), nullable=False),
+    )
+    op.create_index(
+        "ix_meal_plan_recurrences_dates", "meal_plan_recurrences", ["start_date", "until_date"]
+    )
+    op.create_index("ix_meal_plan_recurrences_recipe_id", "meal_plan_recurrences", ["recipe_id"])
+    op.create_index(
+        "ix_meal_plan_recurrences_meal_type_id", "meal_plan_recurrences", ["meal_type_id"]
+    )
+    op.create_table(
+        "meal_plan_exceptions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "recurrence_id",
+            sa.Integer(),
+            sa.ForeignKey("meal_plan_recurrences.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("skip", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column(
+            "recipe_id",
+            sa.Integer(),
+            sa.ForeignKey("recipes.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("people_count", sa.Integer(), nullable=True),
+        sa.UniqueConstraint("recurrence_id", "date", name="uq_meal_plan_exception"),
+    )
+    op.create_index("ix_meal_plan_exceptions_recipe_id", "meal_plan_exceptions", ["recipe_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_meal_plan_exceptions_recipe_id", table_name="meal_plan_exceptions")
+    op.drop_table("meal_plan_exceptions")
+    op.drop_index("ix_meal_plan_recurrences_meal_type_id", table_name="meal_plan_recurrences")
+    op.drop_index("ix_meal_plan_recurrences_recipe_id", table_name="meal_plan_recurrences")
+    op.drop_index("ix_meal_plan_recurrences_dates", table_name="meal_plan_recurrences")
+    op.drop_table("meal_plan_recurrences")
@@ -0,0 +1,156 @@
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.versions import BUMPED, check_etag, etag_for, resource_versions
+
+
+class TTLCache:
+    """Bounded LRU of values tagged with the resources they were read from.
+
+    Writes committed through this process drop the affected entries at once.
+    Writes from other worker processes are only seen once an entry expires,
+    so `ttl` is the bound on how stale a cached read can be.
+
+    The versions this process committed are remembered too. A read replica
+    may not have caught up with them yet, and a value read from it must not
+    be cached as though it had.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, tuple[str, ...], Any]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._committed: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _generation(self, resources: tuple[str, ...]) -> tuple[int, ...]:
+        return tuple(self._generations.get(name, 0) for name in resources)
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= self._clock():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[2]
+
+    def set(
+        self, key: str, resources: tuple[str, ...], value: Any, generation: tuple[int, ...]
+    ) -> None:
+        # A write committed while the value was loading may or may not be in
+        # it, so the value is handed out once but not kept.
+        if generation != self._generation(resources):
+            return
+        self._entries[key] = (self._clock() + self.ttl, resources, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, resources: Iterable[str]) -> None:
+        resources = set(resources)
+        for name in resources:
+            self._generations[name] = self._generations.get(name, 0) + 1
+        stale = [key for key, (_, tags, _) in self._entries.items() if resources.intersection(tags)]
+        for key in stale:
+            del self._entries[key]
+
+    def committed(self, versions: dict[str, int]) -> None:
+        """Drop entries for versions this process has just committed."""
+        for name, version in versions.items():
+            self._committed[name] = max(self._committed.get(name, 0), version)
+        self.invalidate(versions)
+
+    def behind(self, versions: dict[str, int]) -> bool:
+        """Whether `versions` predate a write this process has committed."""
+        return any(
+            version < self._committed.get(name, 0) for name, version in versions.items()
+        )
+
+    async def get_or_load(
+        self,
+        key: str,
+        resources: tuple[str, ...],
+        load: Callable[[], Awaitable[Any]],
+        keep: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        found, value = self.get(key)
+        if found:
+            return value
+        generation = self._generation(resources)
+        value = await load()
+        if keep is None or keep(value):
+            self.set(key, resources, value, generation)
+        return value
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+reference_cache = TTLCache(settings.reference_cache_size, settings.reference_cache_ttl)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    bumped = session.info.pop(BUMPED, None)
+    if bumped:
+        reference_cache.committed(bumped)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session) -> None:
+    session.info.pop(BUMPED, None)
+
+
+async def cached_list(
+    request: Request,
+    response: Response,
+    session: AsyncSession,
+    resources: tuple[str, ...],
+    load: Callable[[], Awaitable[list]],
+    adapter: TypeAdapter,
+) -> Response:
+    """Serve a whole reference list, with its ETag, from the cache.
+
+    On a hit neither the versions nor the rows are read, so the request never
+    checks a connection out of the pool.
+    """
+
+    async def render() -> tuple[dict[str, int], str, bytes]:
+        versions = await resource_versions(session, resources)
+        items = await load()
+        return versions, etag_for(request, versions), adapter.dump_json(items, by_alias=True)
+
+    def current(entry) -> bool:
+        # A replica still behind this worker's own last write serves the list
+        # as it was, once; caching it would repeat that until the TTL ran out.
+        return not reference_cache.behind(entry[0])
+
+    key = f"{request.url.path}?{request.url.query}"
+    _, etag, body = await reference_cache.get_or_load(key, resources, render, keep=current)
+    if cached := check_etag(request, response, etag):
+        return cached
+    return Response(body, media_type="application/json", headers=response.headers)
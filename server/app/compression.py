@@ -0,0 +1,180 @@
+import zlib
+from collections.abc import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip is offered.
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Events are small and each one would need its own flush, which costs more
+# bytes than compressing them saves.
+EXCLUDED_TYPES = ("text/event-stream",)
+
+
+def no_compression(endpoint: Callable) -> Callable:
+    """Opt a route out of response compression.
+
+    Apply it below the router decorator so the flag lands on the function
+    the route is registered with.
+    """
+    endpoint.__no_compression__ = True
+    return endpoint
+
+
+def _accepted(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        # wbits 31 selects the gzip container rather than raw zlib.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        # A sync flush ends the output on a byte boundary without closing the
+        # stream, so everything passed in so far can be decoded right away.
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """gzip (and, when installed, brotli) compression for HTTP responses.
+
+    Whole bodies under `minimum_size` are sent as they are. Streamed bodies
+    are compressed chunk by chunk as they pass through, since their final
+    size is not known up front.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_enabled: bool = False,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_enabled = brotli_enabled and brotli is not None
+        self.brotli_quality = brotli_quality
+
+    def _encoding(self, scope: Scope) -> str | None:
+        accepted = _accepted(Headers(scope=scope).get("accept-encoding", ""))
+        if self.brotli_enabled and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compressor(self, encoding: str):
+        if encoding == "br":
+            return _Brotli(self.brotli_quality)
+        return _Gzip(self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._encoding(scope)
+        start: Message | None = None
+        compressor = None
+        passthrough = False
+
+        def skip(message: Message) -> bool:
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            # The router has filled in scope["endpoint"] by the time the
+            # response starts.
+            endpoint = scope.get("endpoint")
+            return (
+                encoding is None
+                or getattr(endpoint, "__no_compression__", False)
+                or "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+                or content_type.startswith(EXCLUDED_TYPES)
+            )
+
+        def encode_headers(message: Message) -> MutableHeaders:
+            headers = MutableHeaders(scope=message)
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            return headers
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                passthrough = skip(message)
+                if passthrough:
+                    await send(message)
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body:
+                    if len(body) < self.minimum_size:
+                        MutableHeaders(scope=start).add_vary_header("Accept-Encoding")
+                        await send(start)
+                        await send(message)
+                        return
+                    compressed = self._compressor(encoding)
+                    body = compressed.process(body) + compressed.finish()
+                    headers = encode_headers(start)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                compressor = self._compressor(encoding)
+                headers = encode_headers(start)
+                del headers["Content-Length"]
+                await send(start)
+            if more_body and not body:
+                return
+            # Each streamed chunk is flushed as it goes, so a slow stream
+            # reaches the client as it is produced rather than once the
+            # compressor has filled a block.
+            chunk = compressor.process(body)
+            chunk += compressor.flush() if more_body else compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -8,7 +8,25 @@ class Settings(BaseSettings):
     db_name: str = Field(alias="DB_NAME")
     db_user: str = Field(alias="DB_USER")
     db_password: str = Field(alias="DB_PASSWORD")
+    db_replica_url: str | None = Field(default=None, alias="DB_REPLICA_URL")
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, alias="DB_POOL_TIMEOUT")
+    db_pool_pre_ping: bool = Field(default=True, alias="DB_POOL_PRE_PING")
+    db_pool_recycle: int = Field(default=1800, alias="DB_POOL_RECYCLE")
+    db_statement_cache_size: int = Field(default=100, alias="DB_STATEMENT_CACHE_SIZE")
+    db_pgbouncer: bool = Field(default=False, alias="DB_PGBOUNCER")
     cors_origins: str = Field(default="", alias="CORS_ORIGINS")
+    reference_cache_size: int = Field(default=256, alias="REFERENCE_CACHE_SIZE")
+    reference_cache_ttl: float = Field(default=30.0, alias="REFERENCE_CACHE_TTL")
+    fast_json: bool = Field(default=False, alias="FAST_JSON")
+    compression_enabled: bool = Field(default=True, alias="COMPRESSION_ENABLED")
+    compression_minimum_size: int = Field(default=1024, alias="COMPRESSION_MINIMUM_SIZE")
+    compression_gzip_level: int = Field(default=6, ge=1, le=9, alias="COMPRESSION_GZIP_LEVEL")
+    compression_brotli: bool = Field(default=False, alias="COMPRESSION_BROTLI")
+    compression_brotli_quality: int = Field(
+        default=4, ge=0, le=11, alias="COMPRESSION_BROTLI_QUALITY"
+    )
 
     @property
     def database_url(self) -> str:
@@ -17,6 +35,15 @@ class Settings(BaseSettings):
             f"@{self.db_host}:{self.db_port}/{self.db_name}"
         )
 
+    @property
+    def replica_database_url(self) -> str | None:
+        if not self.db_replica_url:
+            return None
+        scheme, _, rest = self.db_replica_url.partition("://")
+        if scheme in ("postgres", "postgresql"):
+            return f"postgresql+asyncpg://{rest}"
+        return self.db_replica_url
+
     @property
     def cors_origin_list(self) -> list[str]:
         if not self.cors_origins:
@@ -0,0 +1,166 @@
+import asyncio
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import RecipeIngredient
+from app.versions import RECIPES, current_version
+
+
+@dataclass
+class Match:
+    recipe_id: int
+    matched: int
+    # Captured when the index is queried, since a rebuild may drop or reuse
+    # the recipe's slot before the caller gets back to the match.
+    ingredient_ids: tuple[int, ...]
+
+    @property
+    def total(self) -> int:
+        return len(self.ingredient_ids)
+
+    @property
+    def coverage(self) -> float:
+        return self.matched / self.total
+
+    def missing(self, available: set[int]) -> list[int]:
+        return [item for item in self.ingredient_ids if item not in available]
+
+
+class CookableIndex:
+    """Inverted index from ingredient id to the set of recipes using it.
+
+    Each recipe gets a slot number and each ingredient a Python int whose set
+    bits are the slots of the recipes containing it, so a pantry query is a
+    handful of whole-bitset AND/XOR operations rather than a scan over
+    recipe_ingredients. The index is tagged with the recipes resource version
+    and rebuilt when another writer has moved it on.
+    """
+
+    def __init__(self) -> None:
+        self._postings: dict[int, int] = {}
+        self._slots: dict[int, int] = {}
+        self._recipes: list[int | None] = []
+        self._ingredients: list[tuple[int, ...]] = []
+        self._free: list[int] = []
+        self._version: int | None = None
+        self._lock = asyncio.Lock()
+
+    def _clear(self) -> None:
+        self._postings.clear()
+        self._slots.clear()
+        self._recipes.clear()
+        self._ingredients.clear()
+        self._free.clear()
+
+    def _remove(self, recipe_id: int) -> None:
+        slot = self._slots.pop(recipe_id, None)
+        if slot is None:
+            return
+        bit = 1 << slot
+        for ingredient_id in self._ingredients[slot]:
+            remaining = self._postings[ingredient_id] & ~bit
+            if remaining:
+                self._postings[ingredient_id] = remaining
+            else:
+                del self._postings[ingredient_id]
+        self._recipes[slot] = None
+        self._ingredients[slot] = ()
+        self._free.append(slot)
+
+    def _add(self, recipe_id: int, ingredient_ids: Iterable[int]) -> None:
+        ingredient_ids = tuple(sorted(set(ingredient_ids)))
+        if not ingredient_ids:
+            return
+        if self._free:
+            slot = self._free.pop()
+            self._recipes[slot] = recipe_id
+            self._ingredients[slot] = ingredient_ids
+        else:
+            slot = len(self._recipes)
+            self._recipes.append(recipe_id)
+            self._ingredients.append(ingredient_ids)
+        self._slots[recipe_id] = slot
+        bit = 1 << slot
+        for ingredient_id in ingredient_ids:
+            self._postings[ingredient_id] = self._postings.get(ingredient_id, 0) | bit
+
+    async def _rebuild(self, session: AsyncSession, version: int) -> None:
+        result = await session.execute(
+            select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id)
+        )
+        links: dict[int, list[int]] = {}
+        for recipe_id, ingredient_id in result.tuples():
+            links.setdefault(recipe_id, []).append(ingredient_id)
+        self._clear()
+        for recipe_id, ingredient_ids in links.items():
+            self._add(recipe_id, ingredient_ids)
+        self._version = version
+
+    async def ensure_current(self, session: AsyncSession) -> None:
+        # The version is read before the links, so a write landing in between
+        # leaves the index tagged as older than it is and costs one more rebuild
+        # rather than hiding the write.
+        version = await current_version(session, RECIPES)
+        if version == self._version:
+            return
+        async with self._lock:
+            if version != self._version:
+                await self._rebuild(session, version)
+
+    def apply(self, recipe_id: int, ingredient_ids: Iterable[int] | None, version: int) -> None:
+        """Record this worker's own committed write to a recipe.
+
+        `version` is the recipes version the write bumped to. Unless it directly
+        follows the index's version, some other write is missing and the index
+        is left to rebuild on the next query instead.
+        """
+        if self._version is None or version != self._version + 1:
+            self._version = None
+            return
+        self._remove(recipe_id)
+        if ingredient_ids is not None:
+            self._add(recipe_id, ingredient_ids)
+        self._version = version
+
+    def query(self, available: set[int]) -> list[Match]:
+        # Match counts never exceed the number of available ingredients, which
+        # bounds how many bit planes the counters need.
+        planes = [0] * max(1, len(available).bit_length())
+        candidates = 0
+        for ingredient_id in available:
+            carry = self._postings.get(ingredient_id, 0)
+            candidates |= carry
+            # Bit-sliced addition: adds one to the counter of every recipe slot
+            # set in `carry`, across all recipes at once.
+            for level in range(len(planes)):
+                planes[level], carry = planes[level] ^ carry, planes[level] & carry
+                if not carry:
+                    break
+
+        # Reading the counters back bit by bit through int operations would be
+        # quadratic in the number of recipes; the binary strings make it linear.
+        width = candidates.bit_length()
+        flags = format(candidates, f"0{width}b")[::-1]
+        counters = [format(plane, f"0{width}b")[::-1] for plane in planes]
+        matches = []
+        slot = flags.find("1")
+        while slot != -1:
+            matched = sum(1 << level for level, bits in enumerate(counters) if bits[slot] == "1")
+            matches.append(
+                Match(
+                    recipe_id=self._recipes[slot],
+                    matched=matched,
+                    ingredient_ids=self._ingredients[slot],
+                )
+            )
+            slot = flags.find("1", slot + 1)
+        matches.sort(
+            key=lambda match: (-match.coverage, match.total - match.matched, match.recipe_id)
+        )
+        return matches
+
+
+cookable_index = CookableIndex()
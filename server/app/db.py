@@ -1,13 +1,59 @@
+from uuid import uuid4
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
 
-engine = create_async_engine(settings.database_url, echo=False, future=True)
+
+def _connect_args() -> dict:
+    if settings.db_pgbouncer:
+        # PgBouncer in transaction mode hands each transaction whichever server
+        # connection is free, so named prepared statements cannot be cached or
+        # reused by name across transactions.
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+    }
+
+
+def _create_engine(url: str):
+    return create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args=_connect_args(),
+    )
+
+
+engine = _create_engine(settings.database_url)
+
+# Without a replica, reads share the primary's engine and pool.
+read_engine = (
+    _create_engine(settings.replica_database_url) if settings.replica_database_url else engine
+)
 
 AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+ReadSessionLocal = sessionmaker(bind=read_engine, class_=AsyncSession, expire_on_commit=False)
+
 
 async def get_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_session() -> AsyncSession:
+    """Session for GET routes; it reads from the replica when one is configured."""
+    async with ReadSessionLocal() as session:
+        yield session
@@ -0,0 +1,243 @@
+from collections.abc import Iterable
+from datetime import date
+
+from sqlalchemy import delete, func, insert, select, text, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    CumulativeIngredientDemand,
+    Ingredient,
+    IngredientDemand,
+    MealPlan,
+    Recipe,
+    RecipeIngredient,
+)
+from app.versions import MEAL_PLANS, bump
+
+DEMAND_COLUMNS = ["date", "ingredient_id", "unit", "quantity"]
+
+
+# Quotients are carried to QUANTITY_SCALE places, and totals are snapped to
+# SNAP_SCALE before rounding to cents. Each division is off by at most half a
+# unit in the 30th place, so the snap recovers a total that lands exactly on
+# a half cent (18.98499...9 becomes 18.985) and it rounds up like
+# ROUND_HALF_UP would.
+QUANTITY_SCALE = 30
+SNAP_SCALE = 20
+
+
+def portion_quantity(portions, people_amount):
+    """`portions / people_amount` to QUANTITY_SCALE decimal places.
+
+    Postgres sizes a numeric quotient from its operands' scales, so the
+    dividend is widened first; left alone, 1/3 keeps only ~16 digits.
+    """
+    return func.round(portions, QUANTITY_SCALE) / people_amount
+
+
+def round_quantity(total):
+    return func.round(func.round(total, SNAP_SCALE), 2)
+
+
+def demand_select(*criteria):
+    # amount * people_count is exact, so it is summed per recipe size and
+    # divided once per (date, ingredient, unit, people_amount) rather than
+    # once per plan.
+    portions = (
+        select(
+            MealPlan.date,
+            RecipeIngredient.ingredient_id,
+            RecipeIngredient.unit,
+            Recipe.people_amount,
+            func.sum(RecipeIngredient.amount * MealPlan.people_count).label("portions"),
+        )
+        .select_from(MealPlan)
+        .join(Recipe, Recipe.id == MealPlan.recipe_id)
+        .join(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+        .where(*criteria)
+        .group_by(
+            MealPlan.date,
+            RecipeIngredient.ingredient_id,
+            RecipeIngredient.unit,
+            Recipe.people_amount,
+        )
+        .subquery()
+    )
+    return select(
+        portions.c.date,
+        portions.c.ingredient_id,
+        portions.c.unit,
+        func.sum(portion_quantity(portions.c.portions, portions.c.people_amount)).label(
+            "quantity"
+        ),
+    ).group_by(portions.c.date, portions.c.ingredient_id, portions.c.unit)
+
+
+def cumulative_select(start: date | None = None):
+    quantity = func.sum(IngredientDemand.quantity).over(
+        partition_by=(IngredientDemand.ingredient_id, IngredientDemand.unit),
+        order_by=IngredientDemand.date,
+    )
+    criteria = []
+    if start is not None:
+        base = (
+            select(CumulativeIngredientDemand.quantity)
+            .where(
+                CumulativeIngredientDemand.ingredient_id == IngredientDemand.ingredient_id,
+                CumulativeIngredientDemand.unit == IngredientDemand.unit,
+                CumulativeIngredientDemand.date < start,
+            )
+            .order_by(CumulativeIngredientDemand.date.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        quantity = func.coalesce(base, 0) + quantity
+        criteria.append(IngredientDemand.date >= start)
+    return select(
+        IngredientDemand.date,
+        IngredientDemand.ingredient_id,
+        IngredientDemand.unit,
+        quantity.label("quantity"),
+    ).where(*criteria)
+
+
+def _snapshot(keys, day: date, inclusive: bool = True):
+    # Demand accumulated up to `day`, or only before it when not inclusive.
+    # The lower edge of a window is read that way rather than as "up to the
+    # day before", which does not exist for date.min.
+    if inclusive:
+        bound = CumulativeIngredientDemand.date <= day
+    else:
+        bound = CumulativeIngredientDemand.date < day
+    return func.coalesce(
+        select(CumulativeIngredientDemand.quantity)
+        .where(
+            CumulativeIngredientDemand.ingredient_id == keys.c.ingredient_id,
+            CumulativeIngredientDemand.unit == keys.c.unit,
+            bound,
+        )
+        .order_by(CumulativeIngredientDemand.date.desc())
+        .limit(1)
+        .scalar_subquery(),
+        0,
+    )
+
+
+def window_totals_select(from_date: date | None, until_date: date, extra=None):
+    keys = select(RecipeIngredient.ingredient_id, RecipeIngredient.unit).distinct().subquery()
+    quantity = _snapshot(keys, until_date)
+    if from_date is not None:
+        quantity = quantity - _snapshot(keys, from_date, inclusive=False)
+    window = select(keys.c.ingredient_id, keys.c.unit, quantity.label("quantity"))
+    if extra is not None:
+        # Demand that is not materialized (such as recurring plans) arrives as
+        # extra (ingredient_id, unit, quantity) rows and is summed in per key.
+        window = union_all(window, extra)
+    window = window.subquery()
+    return (
+        select(
+            Ingredient.id,
+            Ingredient.name,
+            Ingredient.category,
+            func.min(window.c.unit),
+            round_quantity(func.sum(window.c.quantity)),
+        )
+        .select_from(window)
+        .join(Ingredient, Ingredient.id == window.c.ingredient_id)
+        .where(window.c.quantity > 0)
+        .group_by(Ingredient.id)
+    )
+
+
+async def last_demand_date(session: AsyncSession) -> date | None:
+    result = await session.execute(select(func.max(IngredientDemand.date)))
+    return result.scalar_one()
+
+
+async def plan_dates(session: AsyncSession, *criteria) -> set[date]:
+    result = await session.execute(select(MealPlan.date).where(*criteria).distinct())
+    return set(result.scalars().all())
+
+
+async def lock_demand(session: AsyncSession) -> None:
+    """Serialize demand refreshes for the rest of the transaction.
+
+    Callers that look up which dates to refresh must take the lock before
+    that lookup. Otherwise a plan committed in between is missed, and its
+    own refresh ran against the state before this change.
+    """
+    await session.execute(text("LOCK TABLE ingredient_demand IN SHARE ROW EXCLUSIVE MODE"))
+
+
+async def refresh_demand(session: AsyncSession, dates: Iterable[date]) -> None:
+    dates = set(dates)
+    if not dates:
+        return
+    await session.flush()
+    await lock_demand(session)
+    removed = await session.execute(
+        delete(IngredientDemand)
+        .where(IngredientDemand.date.in_(dates))
+        .returning(IngredientDemand.ingredient_id, IngredientDemand.unit)
+    )
+    keys = set(removed.tuples().all())
+    added = await session.execute(
+        insert(IngredientDemand)
+        .from_select(DEMAND_COLUMNS, demand_select(MealPlan.date.in_(dates)))
+        .returning(IngredientDemand.ingredient_id, IngredientDemand.unit)
+    )
+    keys |= set(added.tuples().all())
+    if not keys:
+        return
+
+    start = min(dates)
+    await session.execute(
+        delete(CumulativeIngredientDemand).where(
+            CumulativeIngredientDemand.date >= start,
+            tuple_(CumulativeIngredientDemand.ingredient_id, CumulativeIngredientDemand.unit).in_(
+                keys
+            ),
+        )
+    )
+    await session.execute(
+        insert(CumulativeIngredientDemand).from_select(
+            DEMAND_COLUMNS,
+            cumulative_select(start).where(
+                tuple_(IngredientDemand.ingredient_id, IngredientDemand.unit).in_(keys)
+            ),
+        )
+    )
+
+
+async def _count_drift(session: AsyncSession, model, expected_select) -> int:
+    expected = expected_select.subquery()
+    result = await session.execute(
+        select(func.count())
+        .select_from(expected)
+        .join(
+            model,
+            (model.date == expected.c.date)
+            & (model.ingredient_id == expected.c.ingredient_id)
+            & (model.unit == expected.c.unit),
+            full=True,
+        )
+        .where(model.quantity.is_distinct_from(expected.c.quantity))
+    )
+    return result.scalar_one()
+
+
+async def rebuild_demand(session: AsyncSession) -> int:
+    await session.execute(text("LOCK TABLE ingredient_demand IN EXCLUSIVE MODE"))
+    drift = await _count_drift(session, IngredientDemand, demand_select())
+    if drift:
+        await session.execute(delete(IngredientDemand))
+        await session.execute(insert(IngredientDemand).from_select(DEMAND_COLUMNS, demand_select()))
+    cumulative_drift = await _count_drift(session, CumulativeIngredientDemand, cumulative_select())
+    if cumulative_drift:
+        await session.execute(delete(CumulativeIngredientDemand))
+        await session.execute(
+            insert(CumulativeIngredientDemand).from_select(DEMAND_COLUMNS, cumulative_select())
+        )
+    if drift or cumulative_drift:
+        await bump(session, MEAL_PLANS)
+    return drift + cumulative_drift
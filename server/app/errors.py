@@ -1,4 +1,5 @@
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 
 
 def not_found(entity: str) -> HTTPException:
@@ -13,3 +14,13 @@ def bad_request(message: str, details: dict | None = None) -> HTTPException:
         status_code=status.HTTP_400_BAD_REQUEST,
         detail={"message": message, "details": details},
     )
+
+
+FOREIGN_KEY_VIOLATION = "23503"
+UNIQUE_VIOLATION = "23505"
+
+
+def violation(exc: IntegrityError) -> tuple[str | None, str | None]:
+    # The driver error carries the SQLSTATE; asyncpg's own exception, chained as
+    # its cause, knows which constraint fired.
+    return getattr(exc.orig, "sqlstate", None), getattr(exc.orig.__cause__, "constraint_name", None)
@@ -0,0 +1,28 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    # Pydantic writes Decimal as a JSON string; orjson only knows float, so it
+    # is the one type handed back to Python.
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for plain dicts and lists, encoded by orjson.
+
+    Returning one from a route skips FastAPI's response_model validation, so
+    the route must build exactly the shape its response_model would produce.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
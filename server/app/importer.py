@@ -0,0 +1,184 @@
+import json
+from collections.abc import Iterable
+from typing import Any, Literal
+
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Ingredient, Recipe
+from app.schemas import RecipeImport, RecipeImportError, RecipeImportResult
+from app.search import refresh_search
+from app.versions import INGREDIENTS, RECIPES, bump
+
+ImportFormat = Literal["json", "ndjson"]
+
+IMPORT_BATCH_SIZE = 1000
+
+MAX_RECIPE_INGREDIENTS = 10
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be read, so no row can be reported."""
+
+
+def parse_rows(
+    raw: bytes | str, fmt: ImportFormat
+) -> tuple[list[tuple[int, Any]], list[RecipeImportError]]:
+    if fmt == "json":
+        try:
+            data = json.loads(raw)
+        except ValueError as exc:
+            raise ImportFileError(f"Invalid JSON: {exc}")
+        if not isinstance(data, list):
+            raise ImportFileError("Expected a JSON array of recipes")
+        return list(enumerate(data)), []
+
+    if isinstance(raw, bytes):
+        try:
+            raw = raw.decode()
+        except UnicodeDecodeError:
+            raise ImportFileError("NDJSON must be UTF-8 encoded")
+    rows, errors = [], []
+    for index, line in enumerate(line for line in raw.splitlines() if line.strip()):
+        try:
+            rows.append((index, json.loads(line)))
+        except ValueError as exc:
+            errors.append(RecipeImportError(index=index, message=f"Invalid JSON: {exc}"))
+    return rows, errors
+
+
+def _validate(index: int, row: Any) -> RecipeImport | RecipeImportError:
+    try:
+        recipe = RecipeImport.model_validate(row)
+    except ValidationError as exc:
+        return RecipeImportError(
+            index=index,
+            message="Invalid recipe",
+            details={"errors": json.loads(exc.json(include_url=False))},
+        )
+    if len(recipe.ingredients) > MAX_RECIPE_INGREDIENTS:
+        return RecipeImportError(
+            index=index, message=f"Recipes can have at most {MAX_RECIPE_INGREDIENTS} ingredients"
+        )
+    names = [item.name for item in recipe.ingredients]
+    if len(set(names)) != len(names):
+        return RecipeImportError(index=index, message="Ingredients must not repeat within a recipe")
+    return recipe
+
+
+async def _resolve_ingredients(
+    session: AsyncSession, recipes: Iterable[tuple[int, RecipeImport]]
+) -> tuple[dict[str, int], bool]:
+    categories: dict[str, str | None] = {}
+    for _, recipe in recipes:
+        for item in recipe.ingredients:
+            if categories.get(item.name) is None:
+                categories[item.name] = item.category
+    names = list(categories)
+    missing = [
+        {"name": name, "category": category}
+        for name, category in categories.items()
+        if category is not None
+    ]
+    created = False
+    if missing:
+        # Names that already exist are left alone, so their category is not
+        # overwritten by whatever the import file says.
+        result = await session.execute(
+            insert(Ingredient)
+            .values(missing)
+            .on_conflict_do_nothing(index_elements=[Ingredient.name])
+            .returning(Ingredient.id)
+        )
+        created = bool(result.all())
+    result = await session.execute(
+        select(Ingredient.name, Ingredient.id).where(Ingredient.name.in_(names))
+    )
+    return dict(result.tuples().all()), created
+
+
+async def _copy(session: AsyncSession, table: str, columns: list[str], records: list[tuple]) -> None:
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(table, columns=columns, records=records)
+
+
+async def import_recipes(session: AsyncSession, rows: list[tuple[int, Any]]) -> RecipeImportResult:
+    errors: list[RecipeImportError] = []
+    valid: list[tuple[int, RecipeImport]] = []
+    for index, row in rows:
+        checked = _validate(index, row)
+        if isinstance(checked, RecipeImportError):
+            errors.append(checked)
+        else:
+            valid.append((index, checked))
+
+    ingredient_ids, ingredients_created = await _resolve_ingredients(session, valid)
+    recipes: list[tuple[int, RecipeImport]] = []
+    for index, recipe in valid:
+        unknown = [item.name for item in recipe.ingredients if item.name not in ingredient_ids]
+        if unknown:
+            errors.append(
+                RecipeImportError(
+                    index=index,
+                    message="Unknown ingredients need a category to be created",
+                    details={"ingredients": unknown},
+                )
+            )
+        else:
+            recipes.append((index, recipe))
+
+    ids: list[int] = []
+    bumped: set[str] = set()
+    if recipes:
+        # Ids are drawn from the sequence up front so both tables can be
+        # written with COPY, which cannot return generated keys.
+        result = await session.execute(
+            select(func.nextval(func.pg_get_serial_sequence("recipes", "id"))).select_from(
+                func.generate_series(1, len(recipes))
+            )
+        )
+        ids = list(result.scalars().all())
+        await _copy(
+            session,
+            "recipes",
+            ["id", "name", "description", "people_amount", "steps"],
+            [
+                (
+                    recipe_id,
+                    recipe.name,
+                    recipe.description,
+                    recipe.people_amount,
+                    json.dumps(recipe.steps),
+                )
+                for recipe_id, (_, recipe) in zip(ids, recipes)
+            ],
+        )
+        await _copy(
+            session,
+            "recipe_ingredients",
+            ["recipe_id", "ingredient_id", "amount", "unit", "sort_order"],
+            [
+                (
+                    recipe_id,
+                    ingredient_ids[item.name],
+                    item.amount,
+                    item.unit,
+                    item.sort_order if item.sort_order is not None else position,
+                )
+                for recipe_id, (_, recipe) in zip(ids, recipes)
+                for position, item in enumerate(recipe.ingredients, start=1)
+            ],
+        )
+        await refresh_search(session, Recipe.id.in_(ids))
+        bumped.add(RECIPES)
+    if ingredients_created:
+        bumped.add(INGREDIENTS)
+    # One bump locks the version rows in sorted order, as every other writer
+    # does; two separate calls could deadlock against an ingredient delete.
+    if bumped:
+        await bump(session, *bumped)
+    errors.sort(key=lambda error: error.index)
+    return RecipeImportResult(created=len(ids), ids=ids, errors=errors)
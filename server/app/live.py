@@ -0,0 +1,82 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+CHANNEL = "shopping_list"
+MAX_PAYLOAD_BYTES = 7900
+QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+
+REFRESH = json.dumps({"type": "refresh"})
+
+
+async def publish(session: AsyncSession, event: dict) -> None:
+    payload = json.dumps(event, default=str)
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        payload = REFRESH
+    await session.execute(select(func.pg_notify(CHANNEL, payload)))
+
+
+class Broadcaster:
+    def __init__(self) -> None:
+        self._connection: asyncpg.Connection | None = None
+        self._subscribers: set[asyncio.Queue] = set()
+        self._lock = asyncio.Lock()
+        self._lost = False
+
+    async def _listen(self) -> None:
+        async with self._lock:
+            if self._connection is not None and not self._connection.is_closed():
+                return
+            self._connection = await asyncpg.connect(
+                settings.database_url.replace("+asyncpg", "")
+            )
+            self._connection.add_termination_listener(self._on_terminated)
+            await self._connection.add_listener(CHANNEL, self._on_notify)
+            if self._lost:
+                self._lost = False
+                self._fan_out(REFRESH)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self._fan_out(payload)
+
+    def _on_terminated(self, connection) -> None:
+        self._connection = None
+        self._lost = True
+
+    def _fan_out(self, payload: str) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(REFRESH)
+
+    async def subscribe(self) -> AsyncIterator[str | None]:
+        await self._listen()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    await self._listen()
+                    yield None
+        finally:
+            self._subscribers.discard(queue)
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+broadcaster = Broadcaster()
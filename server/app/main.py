@@ -1,20 +1,34 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi import HTTPException
 
+from app.cache import reference_cache
+from app.compression import CompressionMiddleware
 from app.config import settings
+from app.live import broadcaster
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, render
 from app.routers import (
     ingredients,
     recipes,
     meal_types,
     meal_plans,
+    meal_plan_recurrences,
     shopping_list,
     shops,
 )
 
-app = FastAPI(title="Meal Planner API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await broadcaster.close()
+
+
+app = FastAPI(title="Meal Planner API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +38,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_enabled=settings.compression_brotli,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+
+# Added last so it wraps the other middleware and times the whole response.
+app.add_middleware(MetricsMiddleware)
+
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -47,9 +73,24 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
     )
 
 
+@app.get("/metrics", tags=["metrics"], include_in_schema=False)
+async def metrics():
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/cache/stats", tags=["cache"])
+async def cache_stats():
+    return reference_cache.stats()
+
+
 app.include_router(ingredients.router, prefix="/ingredients", tags=["ingredients"])
 app.include_router(recipes.router, prefix="/recipes", tags=["recipes"])
 app.include_router(meal_types.router, prefix="/meal-types", tags=["meal-types"])
 app.include_router(meal_plans.router, prefix="/meal-plans", tags=["meal-plans"])
+app.include_router(
+    meal_plan_recurrences.router,
+    prefix="/meal-plan-recurrences",
+    tags=["meal-plan-recurrences"],
+)
 app.include_router(shops.router, prefix="/shops", tags=["shops"])
 app.include_router(shopping_list.router, prefix="/shopping-list", tags=["shopping-list"])
@@ -0,0 +1,242 @@
+"""In-process Prometheus metrics, rendered in the text exposition format.
+
+Every worker process keeps its own registry, so each scrape of /metrics
+reports the worker that served it.
+"""
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache import reference_cache
+from app.db import engine, read_engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Requests that matched no route share one label, so scans for random paths
+# cannot grow the series without bound.
+UNMATCHED = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(
+        self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...]
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        # Counts are stored per bucket and made cumulative when rendered.
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labels + ("le",)
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                label_text = _format_labels(names, labels + (_format_value(bound),))
+                yield f"{self.name}_bucket{label_text} {cumulative}"
+            label_text = _format_labels(self.labels, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total)}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+def _gauge(name: str, help: str, labels: tuple[str, ...], samples) -> Iterator[str]:
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} gauge"
+    for values, value in samples:
+        yield f"{name}{_format_labels(labels, values)} {_format_value(value)}"
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response.",
+    ("method", "route"),
+    LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    "http_requests_total", "Responses sent, by status code.", ("method", "route", "status")
+)
+EXCEPTIONS = Counter(
+    "http_unhandled_exceptions_total",
+    "Exceptions that escaped a route and were answered with a 500.",
+    ("method", "route", "exception"),
+)
+REQUEST_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed while serving one request.",
+    ("method", "route"),
+    STATEMENT_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing SQL statements while serving one request.",
+    ("method", "route"),
+    LATENCY_BUCKETS,
+)
+METRICS = (REQUEST_DURATION, REQUESTS, EXCEPTIONS, REQUEST_STATEMENTS, REQUEST_DB_DURATION)
+
+
+@dataclass
+class _RequestQueries:
+    statements: int = 0
+    seconds: float = 0.0
+
+
+_current: ContextVar[_RequestQueries | None] = ContextVar("request_queries", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    queries = _current.get()
+    if queries is None or context is None:
+        return
+    queries.statements += 1
+    queries.seconds += time.perf_counter() - context._metrics_started
+
+
+def _route(scope: Scope) -> str:
+    # FastAPI fills in scope["route"] while routing, so by the time the
+    # request is finished it names the matched path template.
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        queries = _RequestQueries()
+        token = _current.set(queries)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as exc:
+            # Unhandled exceptions propagate past this middleware to the
+            # outermost handler, which answers with a 500; `status` is still
+            # 500 unless the response had already started.
+            EXCEPTIONS.inc(scope["method"], _route(scope), type(exc).__name__)
+            raise
+        finally:
+            _current.reset(token)
+            method, route = scope["method"], _route(scope)
+            REQUEST_DURATION.observe(time.perf_counter() - started, method, route)
+            REQUESTS.inc(method, route, str(status))
+            REQUEST_STATEMENTS.observe(queries.statements, method, route)
+            REQUEST_DB_DURATION.observe(queries.seconds, method, route)
+
+
+def _pool_samples(measure) -> list[tuple[tuple[str], float]]:
+    engines = [("primary", engine)]
+    if read_engine is not engine:
+        engines.append(("replica", read_engine))
+    samples = []
+    for name, target in engines:
+        pool = target.sync_engine.pool
+        if hasattr(pool, "checkedout"):
+            samples.append(((name,), measure(pool)))
+    return samples
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(
+        _gauge(
+            "db_pool_checked_out",
+            "Connections currently checked out of the pool.",
+            ("engine",),
+            _pool_samples(lambda pool: pool.checkedout()),
+        )
+    )
+    lines.extend(
+        _gauge(
+            "db_pool_overflow",
+            "Connections open beyond pool_size; negative while the pool is not full.",
+            ("engine",),
+            _pool_samples(lambda pool: pool.overflow()),
+        )
+    )
+    lines.extend(
+        _gauge(
+            "db_pool_size",
+            "Configured number of pooled connections.",
+            ("engine",),
+            _pool_samples(lambda pool: pool.size()),
+        )
+    )
+    stats = reference_cache.stats()
+    for name in ("hits", "misses", "evictions"):
+        lines.append(f"# HELP reference_cache_{name}_total Reference cache {name}.")
+        lines.append(f"# TYPE reference_cache_{name}_total counter")
+        lines.append(f"reference_cache_{name}_total {stats[name]}")
+    return "\n".join(lines) + "\n"
@@ -1,16 +1,18 @@
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     Date,
     ForeignKey,
     Integer,
     Numeric,
+    SmallInteger,
     String,
     Text,
     UniqueConstraint,
 )
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import declarative_base, deferred, relationship
 
 Base = declarative_base()
 
@@ -33,6 +35,7 @@ class Recipe(Base):
     description = Column(Text, nullable=False)
     people_amount = Column(Integer, nullable=False)
     steps = Column(JSONB, nullable=False)
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     ingredients = relationship(
         "RecipeIngredient",
@@ -76,6 +79,66 @@ class MealPlan(Base):
     recipe = relationship("Recipe")
 
 
+class MealPlanRecurrence(Base):
+    __tablename__ = "meal_plan_recurrences"
+
+    id = Column(Integer, primary_key=True)
+    meal_type_id = Column(Integer, ForeignKey("meal_types.id", ondelete="CASCADE"), nullable=False)
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False)
+    people_count = Column(Integer, nullable=False)
+    # Bit n set means the plan repeats on ISO weekday n + 1 (bit 0 is Monday).
+    weekdays = Column(SmallInteger, nullable=False)
+    start_date = Column(Date, nullable=False)
+    until_date = Column(Date, nullable=False)
+
+    meal_type = relationship("MealType")
+    recipe = relationship("Recipe")
+    exceptions = relationship(
+        "MealPlanException",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="MealPlanException.date",
+    )
+
+
+class MealPlanException(Base):
+    __tablename__ = "meal_plan_exceptions"
+    __table_args__ = (
+        UniqueConstraint("recurrence_id", "date", name="uq_meal_plan_exception"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    recurrence_id = Column(
+        Integer, ForeignKey("meal_plan_recurrences.id", ondelete="CASCADE"), nullable=False
+    )
+    date = Column(Date, nullable=False)
+    skip = Column(Boolean, nullable=False, default=False)
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=True)
+    people_count = Column(Integer, nullable=True)
+
+
+class IngredientDemand(Base):
+    __tablename__ = "ingredient_demand"
+
+    date = Column(Date, primary_key=True)
+    ingredient_id = Column(
+        Integer, ForeignKey("ingredients.id", ondelete="CASCADE"), primary_key=True
+    )
+    unit = Column(String(50), primary_key=True)
+    quantity = Column(Numeric, nullable=False)
+
+
+class CumulativeIngredientDemand(Base):
+    __tablename__ = "ingredient_demand_cumulative"
+
+    ingredient_id = Column(
+        Integer, ForeignKey("ingredients.id", ondelete="CASCADE"), primary_key=True
+    )
+    unit = Column(String(50), primary_key=True)
+    date = Column(Date, primary_key=True)
+    quantity = Column(Numeric, nullable=False)
+
+
 class Shop(Base):
     __tablename__ = "shops"
 
@@ -112,3 +175,10 @@ class ShopItemOrder(Base):
     sort_order = Column(Integer, nullable=False)
 
     shop = relationship("Shop")
+
+
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False)
@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+from collections.abc import Callable, Sequence
+from datetime import date
+from typing import Any
+
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.errors import bad_request
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, date) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, types: Sequence[Callable[[Any], Any]]) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return [convert(value) for convert, value in zip(types, values)]
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise bad_request("Invalid cursor")
+
+
+def _converter(column) -> Callable[[Any], Any]:
+    python_type = column.type.python_type
+    return date.fromisoformat if python_type is date else python_type
+
+
+def keyset(stmt, columns: Sequence, cursor: str | None, limit: int):
+    # Rows are ordered on a unique key and the next page starts strictly after
+    # the last key seen, so every page is an index range scan of `limit` rows.
+    if cursor is not None:
+        after = decode_cursor(cursor, [_converter(column) for column in columns])
+        stmt = stmt.where(tuple_(*columns) > tuple_(*after))
+    return stmt.order_by(None).order_by(*columns).limit(limit + 1)
+
+
+async def paginate(
+    session: AsyncSession, stmt, columns: Sequence, cursor: str | None, limit: int | None
+) -> tuple[list, str | None]:
+    limit = limit or DEFAULT_PAGE_SIZE
+    result = await session.execute(keyset(stmt, columns, cursor, limit))
+    rows = result.scalars().all()
+    if len(rows) <= limit:
+        return list(rows), None
+    last = rows[limit - 1]
+    return list(rows[:limit]), encode_cursor([getattr(last, column.key) for column in columns])
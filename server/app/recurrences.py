@@ -0,0 +1,98 @@
+from datetime import date
+
+from sqlalchemy import Integer, and_, cast, func, literal, or_, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.demand import portion_quantity
+from app.models import MealPlanException, MealPlanRecurrence, Recipe, RecipeIngredient
+
+
+def weekday_mask(weekdays: list[int]) -> int:
+    return sum(1 << (day - 1) for day in set(weekdays))
+
+
+def mask_weekdays(mask: int) -> list[int]:
+    return [day for day in range(1, 8) if mask & (1 << (day - 1))]
+
+
+def occurrences_select(from_date: date | None, until_date: date | None):
+    """One row per occurrence of every recurrence inside [from_date, until_date].
+
+    Occurrences are never stored: each rule is expanded with generate_series
+    over just the part of its own range that overlaps the window, and an
+    exception row on a date either drops that occurrence or overrides its
+    recipe and people count.
+    """
+    start = MealPlanRecurrence.start_date
+    end = MealPlanRecurrence.until_date
+    criteria = []
+    if from_date is not None:
+        start = func.greatest(start, from_date)
+        criteria.append(MealPlanRecurrence.until_date >= from_date)
+    if until_date is not None:
+        end = func.least(end, until_date)
+        criteria.append(MealPlanRecurrence.start_date <= until_date)
+    offsets = (
+        func.generate_series(0, end - start)
+        .table_valued("offset")
+        .render_derived(name="offsets")
+        .lateral()
+    )
+    day = (start + offsets.c.offset).label("date")
+    weekday_bit = literal(1).op("<<")(cast(func.extract("isodow", day), Integer) - 1)
+    return (
+        select(
+            MealPlanRecurrence.id.label("recurrence_id"),
+            day,
+            MealPlanRecurrence.meal_type_id,
+            func.coalesce(MealPlanException.recipe_id, MealPlanRecurrence.recipe_id).label(
+                "recipe_id"
+            ),
+            func.coalesce(MealPlanException.people_count, MealPlanRecurrence.people_count).label(
+                "people_count"
+            ),
+        )
+        .select_from(MealPlanRecurrence)
+        .join(offsets, true())
+        .outerjoin(
+            MealPlanException,
+            and_(
+                MealPlanException.recurrence_id == MealPlanRecurrence.id,
+                MealPlanException.date == day,
+            ),
+        )
+        .where(
+            *criteria,
+            MealPlanRecurrence.weekdays.op("&")(weekday_bit) != 0,
+            or_(MealPlanException.id.is_(None), MealPlanException.skip.is_(False)),
+        )
+    )
+
+
+def occurrence_demand_select(from_date: date | None, until_date: date):
+    occurrences = occurrences_select(from_date, until_date).subquery()
+    portions = (
+        select(
+            RecipeIngredient.ingredient_id,
+            RecipeIngredient.unit,
+            Recipe.people_amount,
+            func.sum(RecipeIngredient.amount * occurrences.c.people_count).label("portions"),
+        )
+        .select_from(occurrences)
+        .join(Recipe, Recipe.id == occurrences.c.recipe_id)
+        .join(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+        .group_by(RecipeIngredient.ingredient_id, RecipeIngredient.unit, Recipe.people_amount)
+        .subquery()
+    )
+    return select(
+        portions.c.ingredient_id,
+        portions.c.unit,
+        func.sum(portion_quantity(portions.c.portions, portions.c.people_amount)).label(
+            "quantity"
+        ),
+    ).group_by(portions.c.ingredient_id, portions.c.unit)
+
+
+async def last_recurrence_date(session: AsyncSession) -> date | None:
+    result = await session.execute(select(func.max(MealPlanRecurrence.until_date)))
+    return result.scalar_one()
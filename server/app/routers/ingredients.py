@@ -1,32 +1,90 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_session
+from app.cache import cached_list
+from app.db import get_read_session, get_session
 from app.errors import bad_request, not_found
-from app.models import Ingredient
-from app.schemas import IngredientCreate, IngredientOut, IngredientUpdate
+from app.models import Ingredient, Recipe, RecipeIngredient
+from app.pagination import MAX_PAGE_SIZE, paginate
+from app.schemas import IngredientCreate, IngredientOut, IngredientUpdate, Page
+from app.search import ingredient_search_select, refresh_search, search
+from app.streaming import StreamFormat, stream_response, stream_scalars
+from app.versions import INGREDIENTS, RECIPES, bump, not_modified
 
 router = APIRouter()
 
+INGREDIENT_LIST = TypeAdapter(list[IngredientOut])
 
-@router.get("", response_model=list[IngredientOut])
-async def list_ingredients(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(Ingredient).order_by(Ingredient.name))
-    return result.scalars().all()
+
+@router.get("", response_model=list[IngredientOut] | Page[IngredientOut])
+async def list_ingredients(
+    request: Request,
+    response: Response,
+    stream: StreamFormat | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None),
+    session: AsyncSession = Depends(get_read_session),
+):
+    stmt = select(Ingredient).order_by(Ingredient.name)
+    if limit is None and cursor is None and not stream:
+
+        async def load():
+            result = await session.execute(stmt)
+            return [IngredientOut.model_validate(item) for item in result.scalars()]
+
+        return await cached_list(request, response, session, (INGREDIENTS,), load, INGREDIENT_LIST)
+    if cached := await not_modified(request, response, session, (INGREDIENTS,)):
+        return cached
+    if limit is not None or cursor is not None:
+        if stream:
+            raise bad_request("Paged lists cannot be streamed")
+        ingredients, next_cursor = await paginate(
+            session, stmt, (Ingredient.name, Ingredient.id), cursor, limit
+        )
+        return Page[IngredientOut](
+            items=[IngredientOut.model_validate(item) for item in ingredients],
+            nextCursor=next_cursor,
+        )
+    return stream_response(
+        stream_scalars(stmt, IngredientOut.model_validate), stream, headers=response.headers
+    )
+
+
+@router.get("/search", response_model=Page[IngredientOut])
+async def search_ingredients(
+    request: Request,
+    response: Response,
+    q: str = Query(min_length=1),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None),
+    session: AsyncSession = Depends(get_read_session),
+):
+    if cached := await not_modified(request, response, session, (INGREDIENTS,)):
+        return cached
+    ingredients, next_cursor = await search(session, ingredient_search_select, q, cursor, limit)
+    return Page[IngredientOut](
+        items=[IngredientOut.model_validate(item) for item in ingredients],
+        nextCursor=next_cursor,
+    )
 
 
 @router.post("", response_model=IngredientOut)
 async def create_ingredient(payload: IngredientCreate, session: AsyncSession = Depends(get_session)):
-    ingredient = Ingredient(name=payload.name, category=payload.category)
-    session.add(ingredient)
     try:
+        result = await session.execute(
+            insert(Ingredient)
+            .values(name=payload.name, category=payload.category)
+            .returning(Ingredient)
+        )
+        ingredient = result.scalar_one()
+        await bump(session, INGREDIENTS)
         await session.commit()
     except IntegrityError:
         await session.rollback()
         raise bad_request("Ingredient name must be unique")
-    await session.refresh(ingredient)
     return ingredient
 
 
@@ -34,17 +92,29 @@ async def create_ingredient(payload: IngredientCreate, session: AsyncSession = D
 async def update_ingredient(
     ingredient_id: int, payload: IngredientUpdate, session: AsyncSession = Depends(get_session)
 ):
-    ingredient = await session.get(Ingredient, ingredient_id)
-    if not ingredient:
-        raise not_found("Ingredient")
-    ingredient.name = payload.name
-    ingredient.category = payload.category
     try:
+        result = await session.execute(
+            update(Ingredient)
+            .where(Ingredient.id == ingredient_id)
+            .values(name=payload.name, category=payload.category)
+            .returning(Ingredient)
+        )
+        ingredient = result.scalar_one_or_none()
+        if not ingredient:
+            raise not_found("Ingredient")
+        await refresh_search(
+            session,
+            Recipe.id.in_(
+                select(RecipeIngredient.recipe_id).where(
+                    RecipeIngredient.ingredient_id == ingredient_id
+                )
+            ),
+        )
+        await bump(session, INGREDIENTS)
         await session.commit()
     except IntegrityError:
         await session.rollback()
         raise bad_request("Ingredient name must be unique")
-    await session.refresh(ingredient)
     return ingredient
 
 
@@ -53,6 +123,14 @@ async def delete_ingredient(ingredient_id: int, session: AsyncSession = Depends(
     ingredient = await session.get(Ingredient, ingredient_id)
     if not ingredient:
         raise not_found("Ingredient")
-    await session.delete(ingredient)
+    result = await session.execute(
+        select(RecipeIngredient.recipe_id).where(RecipeIngredient.ingredient_id == ingredient_id)
+    )
+    recipe_ids = result.scalars().all()
+    # recipe_ingredients rows go through the database's ON DELETE CASCADE; an
+    # ORM delete would try to null their primary key instead.
+    await session.execute(delete(Ingredient).where(Ingredient.id == ingredient_id))
+    await refresh_search(session, Recipe.id.in_(recipe_ids))
+    await bump(session, INGREDIENTS, RECIPES)
     await session.commit()
     return {"status": "deleted"}
@@ -0,0 +1,205 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.db import get_read_session, get_session
+from app.errors import FOREIGN_KEY_VIOLATION, bad_request, not_found, violation
+from app.models import MealPlanException, MealPlanRecurrence
+from app.recurrences import mask_weekdays, weekday_mask
+from app.schemas import (
+    MealPlanExceptionIn,
+    MealPlanExceptionOut,
+    MealPlanRecurrenceCreate,
+    MealPlanRecurrenceOut,
+    MealPlanRecurrenceUpdate,
+)
+from app.versions import MEAL_PLANS, MEAL_TYPES, RECIPES, bump, not_modified
+
+router = APIRouter()
+
+NOT_FOUND_CONSTRAINTS = {
+    "meal_plan_recurrences_meal_type_id_fkey": "Meal type",
+    "meal_plan_recurrences_recipe_id_fkey": "Recipe",
+    "meal_plan_exceptions_recipe_id_fkey": "Recipe",
+}
+
+
+def _recurrence_to_out(recurrence: MealPlanRecurrence) -> MealPlanRecurrenceOut:
+    return MealPlanRecurrenceOut(
+        id=recurrence.id,
+        mealTypeId=recurrence.meal_type_id,
+        recipeId=recurrence.recipe_id,
+        peopleCount=recurrence.people_count,
+        weekdays=mask_weekdays(recurrence.weekdays),
+        startDate=recurrence.start_date,
+        untilDate=recurrence.until_date,
+        meal_type_name=recurrence.meal_type.name,
+        recipe_name=recurrence.recipe.name,
+        exceptions=[MealPlanExceptionOut.model_validate(item) for item in recurrence.exceptions],
+    )
+
+
+def _recurrence_values(payload: MealPlanRecurrenceCreate | MealPlanRecurrenceUpdate) -> dict:
+    if any(day < 1 or day > 7 for day in payload.weekdays):
+        raise bad_request("weekdays must be ISO weekday numbers from 1 (Monday) to 7 (Sunday)")
+    if payload.start_date > payload.until_date:
+        raise bad_request("startDate must be on or before untilDate")
+    if payload.people_count <= 0:
+        raise bad_request("peopleCount must be positive")
+    return {
+        "meal_type_id": payload.meal_type_id,
+        "recipe_id": payload.recipe_id,
+        "people_count": payload.people_count,
+        "weekdays": weekday_mask(payload.weekdays),
+        "start_date": payload.start_date,
+        "until_date": payload.until_date,
+    }
+
+
+async def _write(session: AsyncSession, stmt):
+    try:
+        return await session.execute(stmt)
+    except IntegrityError as exc:
+        await session.rollback()
+        code, constraint = violation(exc)
+        if code == FOREIGN_KEY_VIOLATION and constraint in NOT_FOUND_CONSTRAINTS:
+            raise not_found(NOT_FOUND_CONSTRAINTS[constraint])
+        raise
+
+
+def _recurrences_select():
+    return select(MealPlanRecurrence).options(
+        joinedload(MealPlanRecurrence.meal_type),
+        joinedload(MealPlanRecurrence.recipe),
+        selectinload(MealPlanRecurrence.exceptions),
+    )
+
+
+async def _load(session: AsyncSession, recurrence_id: int) -> MealPlanRecurrence | None:
+    result = await session.execute(
+        _recurrences_select()
+        .where(MealPlanRecurrence.id == recurrence_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _commit_and_load(session: AsyncSession, recurrence_id: int) -> MealPlanRecurrenceOut:
+    # Occurrences are expanded on read, so there is no demand to refresh; the
+    # version bump is what moves the plan list and shopping list ETags on.
+    await bump(session, MEAL_PLANS)
+    await session.commit()
+    recurrence = await _load(session, recurrence_id)
+    if recurrence is None:
+        # Deleted by another request between the commit and the reload.
+        raise not_found("Meal plan recurrence")
+    return _recurrence_to_out(recurrence)
+
+
+@router.get("", response_model=list[MealPlanRecurrenceOut])
+async def list_recurrences(
+    request: Request, response: Response, session: AsyncSession = Depends(get_read_session)
+):
+    resources = (MEAL_PLANS, MEAL_TYPES, RECIPES)
+    if cached := await not_modified(request, response, session, resources):
+        return cached
+    result = await session.execute(
+        _recurrences_select().order_by(MealPlanRecurrence.start_date, MealPlanRecurrence.id)
+    )
+    return [_recurrence_to_out(recurrence) for recurrence in result.scalars().all()]
+
+
+@router.post("", response_model=MealPlanRecurrenceOut)
+async def create_recurrence(
+    payload: MealPlanRecurrenceCreate, session: AsyncSession = Depends(get_session)
+):
+    result = await _write(
+        session,
+        insert(MealPlanRecurrence)
+        .values(**_recurrence_values(payload))
+        .returning(MealPlanRecurrence.id),
+    )
+    return await _commit_and_load(session, result.scalar_one())
+
+
+@router.put("/{recurrence_id}", response_model=MealPlanRecurrenceOut)
+async def update_recurrence(
+    recurrence_id: int,
+    payload: MealPlanRecurrenceUpdate,
+    session: AsyncSession = Depends(get_session),
+):
+    result = await _write(
+        session,
+        update(MealPlanRecurrence)
+        .where(MealPlanRecurrence.id == recurrence_id)
+        .values(**_recurrence_values(payload))
+        .returning(MealPlanRecurrence.id),
+    )
+    if result.scalar_one_or_none() is None:
+        raise not_found("Meal plan recurrence")
+    return await _commit_and_load(session, recurrence_id)
+
+
+@router.delete("/{recurrence_id}")
+async def delete_recurrence(recurrence_id: int, session: AsyncSession = Depends(get_session)):
+    result = await session.execute(
+        delete(MealPlanRecurrence)
+        .where(MealPlanRecurrence.id == recurrence_id)
+        .returning(MealPlanRecurrence.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise not_found("Meal plan recurrence")
+    await bump(session, MEAL_PLANS)
+    await session.commit()
+    return {"status": "deleted"}
+
+
+@router.put("/{recurrence_id}/exceptions/{day}", response_model=MealPlanRecurrenceOut)
+async def put_exception(
+    recurrence_id: int,
+    day: date,
+    payload: MealPlanExceptionIn,
+    session: AsyncSession = Depends(get_session),
+):
+    recurrence = await session.get(MealPlanRecurrence, recurrence_id)
+    if not recurrence:
+        raise not_found("Meal plan recurrence")
+    if not (recurrence.start_date <= day <= recurrence.until_date) or not (
+        recurrence.weekdays & (1 << (day.isoweekday() - 1))
+    ):
+        raise bad_request("The recurrence has no occurrence on that date")
+    if not payload.skip and payload.recipe_id is None and payload.people_count is None:
+        raise bad_request("An exception must skip the occurrence or override it")
+    if payload.people_count is not None and payload.people_count <= 0:
+        raise bad_request("peopleCount must be positive")
+    values = {
+        "skip": payload.skip,
+        "recipe_id": payload.recipe_id,
+        "people_count": payload.people_count,
+    }
+    await _write(
+        session,
+        pg_insert(MealPlanException)
+        .values(recurrence_id=recurrence_id, date=day, **values)
+        .on_conflict_do_update(constraint="uq_meal_plan_exception", set_=values),
+    )
+    return await _commit_and_load(session, recurrence_id)
+
+
+@router.delete("/{recurrence_id}/exceptions/{day}", response_model=MealPlanRecurrenceOut)
+async def delete_exception(
+    recurrence_id: int, day: date, session: AsyncSession = Depends(get_session)
+):
+    result = await session.execute(
+        delete(MealPlanException)
+        .where(MealPlanException.recurrence_id == recurrence_id, MealPlanException.date == day)
+        .returning(MealPlanException.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise not_found("Meal plan exception")
+    return await _commit_and_load(session, recurrence_id)
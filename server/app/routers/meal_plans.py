@@ -1,88 +1,289 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
-from app.db import get_session
-from app.errors import bad_request, not_found
+from app.config import settings
+from app.db import get_read_session, get_session
+from app.demand import refresh_demand
+from app.errors import FOREIGN_KEY_VIOLATION, bad_request, not_found, violation
+from app.fastjson import FastJSONResponse
 from app.models import MealPlan, MealType, Recipe
-from app.schemas import MealPlanCreate, MealPlanOut, MealPlanUpdate
+from app.pagination import MAX_PAGE_SIZE, paginate
+from app.recurrences import occurrences_select
+from app.schemas import (
+    MealPlanCopy,
+    MealPlanCreate,
+    MealPlanOut,
+    MealPlanRange,
+    MealPlanRangeResult,
+    MealPlanShift,
+    MealPlanUpdate,
+    Page,
+)
+from app.streaming import StreamFormat, iterate, stream_response, stream_scalars
+from app.versions import MEAL_PLANS, MEAL_TYPES, RECIPES, bump, not_modified
 
 router = APIRouter()
 
 
-@router.get("", response_model=list[MealPlanOut])
-async def list_meal_plans(session: AsyncSession = Depends(get_session)):
+def _plan_to_out(plan: MealPlan) -> MealPlanOut:
+    return MealPlanOut(
+        id=plan.id,
+        date=plan.date,
+        mealTypeId=plan.meal_type_id,
+        recipeId=plan.recipe_id,
+        peopleCount=plan.people_count,
+        meal_type_name=plan.meal_type.name,
+        recipe_name=plan.recipe.name,
+    )
+
+
+def _plan_to_json(plan: MealPlan) -> dict:
+    # Same keys, in the same order, as MealPlanOut serialized by alias.
+    return {
+        "date": plan.date,
+        "mealTypeId": plan.meal_type_id,
+        "recipeId": plan.recipe_id,
+        "peopleCount": plan.people_count,
+        "id": plan.id,
+        "recurrenceId": None,
+        "meal_type_name": plan.meal_type.name,
+        "recipe_name": plan.recipe.name,
+    }
+
+
+def _returning_out(write):
+    # Wraps an INSERT/UPDATE ... RETURNING in a CTE and joins the names onto
+    # the written row, so the response needs no follow-up lookups.
+    plan = write.returning(
+        MealPlan.id,
+        MealPlan.date,
+        MealPlan.meal_type_id,
+        MealPlan.recipe_id,
+        MealPlan.people_count,
+    ).cte("plan")
+    return (
+        select(
+            plan.c.id,
+            plan.c.date,
+            plan.c.meal_type_id,
+            plan.c.recipe_id,
+            plan.c.people_count,
+            MealType.name.label("meal_type_name"),
+            Recipe.name.label("recipe_name"),
+        )
+        .join(MealType, MealType.id == plan.c.meal_type_id)
+        .join(Recipe, Recipe.id == plan.c.recipe_id)
+    )
+
+
+async def _occurrences_out(
+    session: AsyncSession, from_date: date | None, to_date: date | None
+) -> list[MealPlanOut]:
+    occurrences = occurrences_select(from_date, to_date).subquery()
     result = await session.execute(
-        select(MealPlan).options(joinedload(MealPlan.meal_type), joinedload(MealPlan.recipe))
+        select(
+            occurrences,
+            MealType.name.label("meal_type_name"),
+            Recipe.name.label("recipe_name"),
+        )
+        .join(MealType, MealType.id == occurrences.c.meal_type_id)
+        .join(Recipe, Recipe.id == occurrences.c.recipe_id)
+        .order_by(occurrences.c.date, occurrences.c.meal_type_id, occurrences.c.recurrence_id)
     )
+    return [MealPlanOut.model_validate(row) for row in result]
+
+
+async def _chain(*parts):
+    for part in parts:
+        async for item in part:
+            yield item
+
+
+@router.get("", response_model=list[MealPlanOut] | Page[MealPlanOut])
+async def list_meal_plans(
+    request: Request,
+    response: Response,
+    stream: StreamFormat | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None),
+    from_date: date | None = Query(default=None, alias="from"),
+    to_date: date | None = Query(default=None, alias="to"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    if from_date and to_date and from_date > to_date:
+        raise bad_request("from must be on or before to")
+    resources = (MEAL_PLANS, MEAL_TYPES, RECIPES)
+    if cached := await not_modified(request, response, session, resources):
+        return cached
+    stmt = select(MealPlan).options(joinedload(MealPlan.meal_type), joinedload(MealPlan.recipe))
+    if from_date:
+        stmt = stmt.where(MealPlan.date >= from_date)
+    if to_date:
+        stmt = stmt.where(MealPlan.date <= to_date)
+    if limit is not None or cursor is not None:
+        if stream:
+            raise bad_request("Paged lists cannot be streamed")
+        plans, next_cursor = await paginate(
+            session, stmt, (MealPlan.date, MealPlan.id), cursor, limit
+        )
+        if settings.fast_json:
+            return FastJSONResponse(
+                {"items": [_plan_to_json(plan) for plan in plans], "nextCursor": next_cursor},
+                headers=response.headers,
+            )
+        return Page[MealPlanOut](
+            items=[_plan_to_out(plan) for plan in plans], nextCursor=next_cursor
+        )
+    # Pages only walk the stored plans; whole-window lists also carry the
+    # occurrences of recurring plans, expanded for just that window.
+    occurrences = await _occurrences_out(session, from_date, to_date)
+    if stream:
+        return stream_response(
+            _chain(stream_scalars(stmt, _plan_to_out), iterate(occurrences)),
+            stream,
+            headers=response.headers,
+        )
+    result = await session.execute(stmt)
     plans = result.scalars().all()
-    return [
-        MealPlanOut(
-            id=plan.id,
-            date=plan.date,
-            mealTypeId=plan.meal_type_id,
-            recipeId=plan.recipe_id,
-            peopleCount=plan.people_count,
-            meal_type_name=plan.meal_type.name,
-            recipe_name=plan.recipe.name,
+    if settings.fast_json:
+        return FastJSONResponse(
+            [_plan_to_json(plan) for plan in plans]
+            + [occurrence.model_dump(by_alias=True) for occurrence in occurrences],
+            headers=response.headers,
         )
-        for plan in plans
-    ]
+    return [_plan_to_out(plan) for plan in plans] + occurrences
 
 
 @router.post("", response_model=MealPlanOut)
 async def create_meal_plan(payload: MealPlanCreate, session: AsyncSession = Depends(get_session)):
-    meal_type = await session.get(MealType, payload.meal_type_id)
-    recipe = await session.get(Recipe, payload.recipe_id)
-    if not meal_type:
-        raise not_found("Meal type")
-    if not recipe:
-        raise not_found("Recipe")
     if payload.people_count <= 0:
         raise bad_request("peopleCount must be positive")
-    plan = MealPlan(
-        date=payload.date,
-        meal_type_id=payload.meal_type_id,
-        recipe_id=payload.recipe_id,
-        people_count=payload.people_count,
-    )
-    session.add(plan)
+    try:
+        result = await session.execute(
+            _returning_out(
+                insert(MealPlan).values(
+                    date=payload.date,
+                    meal_type_id=payload.meal_type_id,
+                    recipe_id=payload.recipe_id,
+                    people_count=payload.people_count,
+                )
+            )
+        )
+    except IntegrityError as exc:
+        await session.rollback()
+        code, constraint = violation(exc)
+        if code == FOREIGN_KEY_VIOLATION and constraint == "meal_plans_meal_type_id_fkey":
+            raise not_found("Meal type")
+        if code == FOREIGN_KEY_VIOLATION and constraint == "meal_plans_recipe_id_fkey":
+            raise not_found("Recipe")
+        raise
+    plan = MealPlanOut.model_validate(result.one())
+    await refresh_demand(session, {plan.date})
+    await bump(session, MEAL_PLANS)
     await session.commit()
-    await session.refresh(plan)
-    return MealPlanOut(
-        id=plan.id,
-        date=plan.date,
-        mealTypeId=plan.meal_type_id,
-        recipeId=plan.recipe_id,
-        peopleCount=plan.people_count,
-        meal_type_name=meal_type.name,
-        recipe_name=recipe.name,
+    return plan
+
+
+def _in_range(payload: MealPlanRange):
+    if payload.from_date > payload.to_date:
+        raise bad_request("from must be on or before to")
+    return MealPlan.date.between(payload.from_date, payload.to_date)
+
+
+def _check_moved(payload: MealPlanRange, days: int) -> None:
+    # Reject ranges that would leave the representable dates up front, rather
+    # than letting the database fail halfway through the statement.
+    try:
+        payload.from_date + timedelta(days=days)
+        payload.to_date + timedelta(days=days)
+    except OverflowError:
+        raise bad_request("The plans would be moved outside the supported dates")
+
+
+async def _finish_range(
+    session: AsyncSession, status: str, dates: set[date], count: int
+) -> MealPlanRangeResult:
+    if count:
+        await refresh_demand(session, dates)
+        await bump(session, MEAL_PLANS)
+        await session.commit()
+    return MealPlanRangeResult(status=status, count=count)
+
+
+@router.post("/copy", response_model=MealPlanRangeResult)
+async def copy_meal_plans(payload: MealPlanCopy, session: AsyncSession = Depends(get_session)):
+    in_range = _in_range(payload)
+    offset = (payload.target_start - payload.from_date).days
+    _check_moved(payload, offset)
+    source = select(
+        MealPlan.date + offset, MealPlan.meal_type_id, MealPlan.recipe_id, MealPlan.people_count
+    ).where(in_range)
+    result = await session.execute(
+        insert(MealPlan)
+        .from_select(["date", "meal_type_id", "recipe_id", "people_count"], source)
+        .returning(MealPlan.date)
+    )
+    dates = result.scalars().all()
+    return await _finish_range(session, "copied", set(dates), len(dates))
+
+
+@router.post("/shift", response_model=MealPlanRangeResult)
+async def shift_meal_plans(payload: MealPlanShift, session: AsyncSession = Depends(get_session)):
+    in_range = _in_range(payload)
+    if not payload.days:
+        return MealPlanRangeResult(status="shifted", count=0)
+    _check_moved(payload, payload.days)
+    result = await session.execute(
+        update(MealPlan)
+        .where(in_range)
+        .values(date=MealPlan.date + payload.days)
+        .returning(MealPlan.date)
+        .execution_options(synchronize_session=False)
+    )
+    moved = result.scalars().all()
+    # Demand changes on both the dates the plans left and the ones they landed on.
+    dates = set(moved) | {day - timedelta(days=payload.days) for day in moved}
+    return await _finish_range(session, "shifted", dates, len(moved))
+
+
+@router.post("/clear", response_model=MealPlanRangeResult)
+async def clear_meal_plans(payload: MealPlanRange, session: AsyncSession = Depends(get_session)):
+    result = await session.execute(
+        delete(MealPlan)
+        .where(_in_range(payload))
+        .returning(MealPlan.date)
+        .execution_options(synchronize_session=False)
     )
+    dates = result.scalars().all()
+    return await _finish_range(session, "cleared", set(dates), len(dates))
 
 
 @router.put("/{plan_id}", response_model=MealPlanOut)
 async def update_meal_plan(
     plan_id: int, payload: MealPlanUpdate, session: AsyncSession = Depends(get_session)
 ):
-    plan = await session.get(MealPlan, plan_id)
-    if not plan:
-        raise not_found("Meal plan")
     if payload.people_count <= 0:
         raise bad_request("peopleCount must be positive")
-    plan.people_count = payload.people_count
-    await session.commit()
-    meal_type = await session.get(MealType, plan.meal_type_id)
-    recipe = await session.get(Recipe, plan.recipe_id)
-    return MealPlanOut(
-        id=plan.id,
-        date=plan.date,
-        mealTypeId=plan.meal_type_id,
-        recipeId=plan.recipe_id,
-        peopleCount=plan.people_count,
-        meal_type_name=meal_type.name if meal_type else "",
-        recipe_name=recipe.name if recipe else "",
+    result = await session.execute(
+        _returning_out(
+            update(MealPlan)
+            .where(MealPlan.id == plan_id)
+            .values(people_count=payload.people_count)
+        )
     )
+    row = result.one_or_none()
+    if not row:
+        raise not_found("Meal plan")
+    plan = MealPlanOut.model_validate(row)
+    await refresh_demand(session, {plan.date})
+    await bump(session, MEAL_PLANS)
+    await session.commit()
+    return plan
 
 
 @router.delete("/{plan_id}")
@@ -91,5 +292,7 @@ async def delete_meal_plan(plan_id: int, session: AsyncSession = Depends(get_ses
     if not plan:
         raise not_found("Meal plan")
     await session.delete(plan)
+    await refresh_demand(session, {plan.date})
+    await bump(session, MEAL_PLANS)
     await session.commit()
     return {"status": "deleted"}
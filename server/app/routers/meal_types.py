@@ -1,32 +1,45 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_session
+from app.cache import cached_list
+from app.db import get_read_session, get_session
+from app.demand import lock_demand, plan_dates, refresh_demand
 from app.errors import bad_request, not_found
-from app.models import MealType
+from app.models import MealPlan, MealType
 from app.schemas import MealTypeCreate, MealTypeOut, MealTypeUpdate
+from app.versions import MEAL_PLANS, MEAL_TYPES, bump
 
 router = APIRouter()
 
+MEAL_TYPE_LIST = TypeAdapter(list[MealTypeOut])
+
 
 @router.get("", response_model=list[MealTypeOut])
-async def list_meal_types(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(MealType).order_by(MealType.name))
-    return result.scalars().all()
+async def list_meal_types(
+    request: Request, response: Response, session: AsyncSession = Depends(get_read_session)
+):
+    async def load():
+        result = await session.execute(select(MealType).order_by(MealType.name))
+        return [MealTypeOut.model_validate(item) for item in result.scalars()]
+
+    return await cached_list(request, response, session, (MEAL_TYPES,), load, MEAL_TYPE_LIST)
 
 
 @router.post("", response_model=MealTypeOut)
 async def create_meal_type(payload: MealTypeCreate, session: AsyncSession = Depends(get_session)):
-    meal_type = MealType(name=payload.name)
-    session.add(meal_type)
     try:
+        result = await session.execute(
+            insert(MealType).values(name=payload.name).returning(MealType)
+        )
+        meal_type = result.scalar_one()
+        await bump(session, MEAL_TYPES)
         await session.commit()
     except IntegrityError:
         await session.rollback()
         raise bad_request("Meal type name must be unique")
-    await session.refresh(meal_type)
     return meal_type
 
 
@@ -34,16 +47,21 @@ async def create_meal_type(payload: MealTypeCreate, session: AsyncSession = Depe
 async def update_meal_type(
     meal_type_id: int, payload: MealTypeUpdate, session: AsyncSession = Depends(get_session)
 ):
-    meal_type = await session.get(MealType, meal_type_id)
-    if not meal_type:
-        raise not_found("Meal type")
-    meal_type.name = payload.name
     try:
+        result = await session.execute(
+            update(MealType)
+            .where(MealType.id == meal_type_id)
+            .values(name=payload.name)
+            .returning(MealType)
+        )
+        meal_type = result.scalar_one_or_none()
+        if not meal_type:
+            raise not_found("Meal type")
+        await bump(session, MEAL_TYPES)
         await session.commit()
     except IntegrityError:
         await session.rollback()
         raise bad_request("Meal type name must be unique")
-    await session.refresh(meal_type)
     return meal_type
 
 
@@ -52,6 +70,10 @@ async def delete_meal_type(meal_type_id: int, session: AsyncSession = Depends(ge
     meal_type = await session.get(MealType, meal_type_id)
     if not meal_type:
         raise not_found("Meal type")
+    await lock_demand(session)
+    dates = await plan_dates(session, MealPlan.meal_type_id == meal_type_id)
     await session.delete(meal_type)
+    await refresh_demand(session, dates)
+    await bump(session, MEAL_TYPES, MEAL_PLANS)
     await session.commit()
     return {"status": "deleted"}
@@ -1,15 +1,46 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from decimal import ROUND_HALF_UP, Decimal
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.db import get_session
-from app.errors import bad_request, not_found
-from app.models import Ingredient, Recipe, RecipeIngredient
-from app.schemas import RecipeCreate, RecipeOut, RecipeUpdate
+from app.config import settings
+from app.cookable import cookable_index
+from app.db import get_read_session, get_session
+from app.demand import lock_demand, plan_dates, refresh_demand
+from app.errors import (
+    FOREIGN_KEY_VIOLATION,
+    UNIQUE_VIOLATION,
+    bad_request,
+    not_found,
+    violation,
+)
+from app.fastjson import FastJSONResponse
+from app.importer import ImportFileError, import_recipes, parse_rows
+from app.models import Ingredient, MealPlan, Recipe, RecipeIngredient
+from app.pagination import MAX_PAGE_SIZE, paginate
+from app.schemas import (
+    CookableRecipe,
+    Page,
+    RecipeCreate,
+    RecipeImportResult,
+    RecipeIngredientIn,
+    RecipeOut,
+    RecipeSummary,
+    RecipeUpdate,
+)
+from app.search import recipe_search_select, refresh_search, search
+from app.streaming import StreamFormat, stream_response, stream_scalars
+from app.versions import INGREDIENTS, MEAL_PLANS, RECIPES, bump, not_modified
 
 router = APIRouter()
 
+# recipe_ingredients.amount is Numeric(10, 2); responses built from the payload
+# are rounded the way Postgres stores the value.
+AMOUNT_SCALE = Decimal("0.01")
+
 
 def _recipe_to_out(recipe: Recipe) -> RecipeOut:
     return RecipeOut(
@@ -32,51 +63,263 @@ def _recipe_to_out(recipe: Recipe) -> RecipeOut:
     )
 
 
-@router.get("", response_model=list[RecipeOut])
-async def list_recipes(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(
+def _recipe_to_json(recipe: Recipe) -> dict:
+    # Same keys, in the same order, as RecipeOut serialized by alias.
+    return {
+        "name": recipe.name,
+        "description": recipe.description,
+        "peopleAmount": recipe.people_amount,
+        "steps": recipe.steps,
+        "id": recipe.id,
+        "ingredients": [
+            {
+                "ingredient_id": link.ingredient_id,
+                "amount": link.amount,
+                "unit": link.unit,
+                "sort_order": link.sort_order,
+                "ingredient_name": link.ingredient.name,
+                "ingredient_category": link.ingredient.category,
+            }
+            for link in recipe.ingredients
+        ],
+    }
+
+
+def _sync_links(recipe: Recipe, items: list[RecipeIngredientIn]) -> bool:
+    # Only links whose ingredient, amount, unit or position changed are
+    # written; an unchanged list issues no recipe_ingredients statements at all.
+    existing = {link.ingredient_id: link for link in recipe.ingredients}
+    incoming = {item.ingredient_id: item for item in items}
+    changed = False
+    for ingredient_id, link in existing.items():
+        if ingredient_id not in incoming:
+            recipe.ingredients.remove(link)
+            changed = True
+    for ingredient_id, item in incoming.items():
+        link = existing.get(ingredient_id)
+        if link is None:
+            recipe.ingredients.append(
+                RecipeIngredient(
+                    ingredient_id=ingredient_id,
+                    amount=item.amount,
+                    unit=item.unit,
+                    sort_order=item.sort_order,
+                )
+            )
+            changed = True
+        elif (link.amount, link.unit, link.sort_order) != (item.amount, item.unit, item.sort_order):
+            link.amount = item.amount
+            link.unit = item.unit
+            link.sort_order = item.sort_order
+            changed = True
+    return changed
+
+
+@router.get("", response_model=list[RecipeOut] | Page[RecipeOut])
+async def list_recipes(
+    request: Request,
+    response: Response,
+    stream: StreamFormat | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None),
+    session: AsyncSession = Depends(get_read_session),
+):
+    if cached := await not_modified(request, response, session, (RECIPES, INGREDIENTS)):
+        return cached
+    stmt = (
         select(Recipe)
         .options(selectinload(Recipe.ingredients).selectinload(RecipeIngredient.ingredient))
         .order_by(Recipe.name)
     )
+    if limit is not None or cursor is not None:
+        if stream:
+            raise bad_request("Paged lists cannot be streamed")
+        recipes, next_cursor = await paginate(
+            session, stmt, (Recipe.name, Recipe.id), cursor, limit
+        )
+        if settings.fast_json:
+            return FastJSONResponse(
+                {
+                    "items": [_recipe_to_json(recipe) for recipe in recipes],
+                    "nextCursor": next_cursor,
+                },
+                headers=response.headers,
+            )
+        return Page[RecipeOut](
+            items=[_recipe_to_out(recipe) for recipe in recipes], nextCursor=next_cursor
+        )
+    if stream:
+        return stream_response(
+            stream_scalars(stmt, _recipe_to_out), stream, headers=response.headers
+        )
+    result = await session.execute(stmt)
     recipes = result.scalars().unique().all()
+    if settings.fast_json:
+        return FastJSONResponse(
+            [_recipe_to_json(recipe) for recipe in recipes], headers=response.headers
+        )
     return [_recipe_to_out(recipe) for recipe in recipes]
 
 
+@router.get("/summary", response_model=list[RecipeSummary])
+async def list_recipe_summaries(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+):
+    if cached := await not_modified(request, response, session, (RECIPES,)):
+        return cached
+    result = await session.execute(
+        select(Recipe.id, Recipe.name, Recipe.people_amount).order_by(Recipe.name, Recipe.id)
+    )
+    return [RecipeSummary.model_validate(row) for row in result.all()]
+
+
+@router.get("/search", response_model=Page[RecipeOut])
+async def search_recipes(
+    request: Request,
+    response: Response,
+    q: str = Query(min_length=1),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None),
+    session: AsyncSession = Depends(get_read_session),
+):
+    if cached := await not_modified(request, response, session, (RECIPES, INGREDIENTS)):
+        return cached
+    recipes, next_cursor = await search(session, recipe_search_select, q, cursor, limit)
+    return Page[RecipeOut](
+        items=[_recipe_to_out(recipe) for recipe in recipes], nextCursor=next_cursor
+    )
+
+
+@router.get("/cookable", response_model=list[CookableRecipe])
+async def list_cookable_recipes(
+    request: Request,
+    response: Response,
+    ingredient_ids: list[int] = Query(alias="ingredientIds"),
+    min_coverage: float = Query(default=0.0, alias="minCoverage", ge=0, le=1),
+    limit: int = Query(default=20, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
+):
+    if cached := await not_modified(request, response, session, (RECIPES,)):
+        return cached
+    await cookable_index.ensure_current(session)
+    available = set(ingredient_ids)
+    matches = [
+        match for match in cookable_index.query(available) if match.coverage >= min_coverage
+    ][:limit]
+    if not matches:
+        return []
+    result = await session.execute(
+        select(Recipe.id, Recipe.name, Recipe.people_amount).where(
+            Recipe.id.in_([match.recipe_id for match in matches])
+        )
+    )
+    summaries = {row.id: RecipeSummary.model_validate(row) for row in result.all()}
+    return [
+        CookableRecipe(
+            recipe=summaries[match.recipe_id],
+            coverage=round(match.coverage, 4),
+            matched=match.matched,
+            total=match.total,
+            missingIngredientIds=match.missing(available),
+        )
+        for match in matches
+        if match.recipe_id in summaries
+    ]
+
+
 @router.post("", response_model=RecipeOut)
 async def create_recipe(payload: RecipeCreate, session: AsyncSession = Depends(get_session)):
     if len(payload.ingredients) > 10:
         raise bad_request("Recipes can have at most 10 ingredients")
-    ingredient_ids = [item.ingredient_id for item in payload.ingredients]
-    result = await session.execute(select(Ingredient).where(Ingredient.id.in_(ingredient_ids)))
-    ingredients = {item.id for item in result.scalars().all()}
-    if len(ingredients) != len(set(ingredient_ids)):
-        raise bad_request("One or more ingredients do not exist")
-
-    recipe = Recipe(
+    result = await session.execute(
+        insert(Recipe)
+        .values(
+            name=payload.name,
+            description=payload.description,
+            people_amount=payload.people_amount,
+            steps=payload.steps,
+        )
+        .returning(Recipe.id)
+    )
+    recipe_id = result.scalar_one()
+    links = []
+    if payload.ingredients:
+        # The links are inserted in a CTE that is joined to ingredients, so the
+        # names for the response come back from the same statement.
+        inserted = (
+            insert(RecipeIngredient)
+            .values(
+                [
+                    {
+                        "recipe_id": recipe_id,
+                        "ingredient_id": item.ingredient_id,
+                        "amount": item.amount,
+                        "unit": item.unit,
+                        "sort_order": item.sort_order,
+                    }
+                    for item in payload.ingredients
+                ]
+            )
+            .returning(
+                RecipeIngredient.ingredient_id,
+                RecipeIngredient.amount,
+                RecipeIngredient.unit,
+                RecipeIngredient.sort_order,
+            )
+            .cte("links")
+        )
+        try:
+            result = await session.execute(
+                select(
+                    inserted,
+                    Ingredient.name.label("ingredient_name"),
+                    Ingredient.category.label("ingredient_category"),
+                )
+                .join(Ingredient, Ingredient.id == inserted.c.ingredient_id)
+                .order_by(inserted.c.sort_order)
+            )
+        except IntegrityError as exc:
+            await session.rollback()
+            code, _ = violation(exc)
+            if code == FOREIGN_KEY_VIOLATION:
+                raise bad_request("One or more ingredients do not exist")
+            if code == UNIQUE_VIOLATION:
+                raise bad_request("Ingredients must not repeat within a recipe")
+            raise
+        links = [dict(row._mapping) for row in result]
+    await refresh_search(session, Recipe.id == recipe_id)
+    versions = await bump(session, RECIPES)
+    await session.commit()
+    cookable_index.apply(
+        recipe_id, [item.ingredient_id for item in payload.ingredients], versions[RECIPES]
+    )
+    return RecipeOut(
+        id=recipe_id,
         name=payload.name,
         description=payload.description,
-        people_amount=payload.people_amount,
+        peopleAmount=payload.people_amount,
         steps=payload.steps,
+        ingredients=links,
     )
-    for item in payload.ingredients:
-        recipe.ingredients.append(
-            RecipeIngredient(
-                ingredient_id=item.ingredient_id,
-                amount=item.amount,
-                unit=item.unit,
-                sort_order=item.sort_order,
-            )
-        )
-    session.add(recipe)
+
+
+@router.post("/import", response_model=RecipeImportResult)
+async def import_recipe_batch(request: Request, session: AsyncSession = Depends(get_session)):
+    fmt = "ndjson" if "ndjson" in request.headers.get("content-type", "") else "json"
+    try:
+        rows, errors = parse_rows(await request.body(), fmt)
+    except ImportFileError as exc:
+        raise bad_request(str(exc))
+    result = await import_recipes(session, rows)
     await session.commit()
-    await session.refresh(recipe)
-    await session.refresh(recipe, attribute_names=["ingredients"])
-    return await get_recipe(recipe.id, session)
+    result.errors = sorted(errors + result.errors, key=lambda error: error.index)
+    return result
 
 
 @router.get("/{recipe_id}", response_model=RecipeOut)
-async def get_recipe(recipe_id: int, session: AsyncSession = Depends(get_session)):
+async def get_recipe(recipe_id: int, session: AsyncSession = Depends(get_read_session)):
     result = await session.execute(
         select(Recipe)
         .where(Recipe.id == recipe_id)
@@ -94,32 +337,59 @@ async def update_recipe(
 ):
     if len(payload.ingredients) > 10:
         raise bad_request("Recipes can have at most 10 ingredients")
-    recipe = await session.get(Recipe, recipe_id)
+    result = await session.execute(
+        select(Recipe).where(Recipe.id == recipe_id).options(selectinload(Recipe.ingredients))
+    )
+    recipe = result.scalars().first()
     if not recipe:
         raise not_found("Recipe")
     ingredient_ids = [item.ingredient_id for item in payload.ingredients]
     result = await session.execute(select(Ingredient).where(Ingredient.id.in_(ingredient_ids)))
-    ingredients = {item.id for item in result.scalars().all()}
+    ingredients = {item.id: item for item in result.scalars().all()}
     if len(ingredients) != len(set(ingredient_ids)):
         raise bad_request("One or more ingredients do not exist")
+    if len(set(ingredient_ids)) != len(ingredient_ids):
+        raise bad_request("Ingredients must not repeat within a recipe")
 
+    text_changed = (recipe.name, recipe.description, recipe.steps) != (
+        payload.name,
+        payload.description,
+        payload.steps,
+    )
+    people_changed = recipe.people_amount != payload.people_amount
     recipe.name = payload.name
     recipe.description = payload.description
     recipe.people_amount = payload.people_amount
     recipe.steps = payload.steps
+    links_changed = _sync_links(recipe, payload.ingredients)
 
-    recipe.ingredients = []
-    for item in payload.ingredients:
-        recipe.ingredients.append(
-            RecipeIngredient(
-                ingredient_id=item.ingredient_id,
-                amount=item.amount,
-                unit=item.unit,
-                sort_order=item.sort_order,
-            )
-        )
-    await session.commit()
-    return await get_recipe(recipe_id, session)
+    if links_changed or people_changed:
+        await lock_demand(session)
+        await refresh_demand(session, await plan_dates(session, MealPlan.recipe_id == recipe_id))
+    if links_changed or text_changed:
+        await refresh_search(session, Recipe.id == recipe_id)
+    if links_changed or text_changed or people_changed:
+        versions = await bump(session, RECIPES)
+        await session.commit()
+        cookable_index.apply(recipe_id, ingredient_ids, versions[RECIPES])
+    return RecipeOut(
+        id=recipe.id,
+        name=recipe.name,
+        description=recipe.description,
+        peopleAmount=recipe.people_amount,
+        steps=recipe.steps,
+        ingredients=[
+            {
+                "ingredient_id": item.ingredient_id,
+                "amount": item.amount.quantize(AMOUNT_SCALE, ROUND_HALF_UP),
+                "unit": item.unit,
+                "sort_order": item.sort_order,
+                "ingredient_name": ingredients[item.ingredient_id].name,
+                "ingredient_category": ingredients[item.ingredient_id].category,
+            }
+            for item in sorted(payload.ingredients, key=lambda item: item.sort_order)
+        ],
+    )
 
 
 @router.delete("/{recipe_id}")
@@ -127,6 +397,11 @@ async def delete_recipe(recipe_id: int, session: AsyncSession = Depends(get_sess
     recipe = await session.get(Recipe, recipe_id)
     if not recipe:
         raise not_found("Recipe")
+    await lock_demand(session)
+    dates = await plan_dates(session, MealPlan.recipe_id == recipe_id)
     await session.delete(recipe)
+    await refresh_demand(session, dates)
+    versions = await bump(session, RECIPES, MEAL_PLANS)
     await session.commit()
+    cookable_index.apply(recipe_id, None, versions[RECIPES])
     return {"status": "deleted"}
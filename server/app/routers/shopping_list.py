@@ -1,32 +1,77 @@
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import String, case, func, literal, select, union_all, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.db import get_session
+from app.cache import reference_cache
+from app.compression import no_compression
+from app.db import get_read_session, get_session
+from app.demand import last_demand_date, window_totals_select
 from app.errors import bad_request, not_found
+from app.live import HEARTBEAT_SECONDS, broadcaster, publish
 from app.models import (
     CustomShoppingItem,
-    MealPlan,
-    Recipe,
-    RecipeIngredient,
     ShoppingItemState,
     Shop,
     ShopItemOrder,
 )
+from app.recurrences import last_recurrence_date, occurrence_demand_select
 from app.schemas import (
     CustomItemCreate,
     LearnOrderRequest,
     ShoppingListItem,
     ShoppingListResponse,
+    ShopItemOrdering,
+    ShopsShoppingListResponse,
     ToggleItemRequest,
+    ToggleItemsRequest,
+)
+from app.streaming import StreamFormat, iterate, stream_response
+from app.versions import (
+    CUSTOM_ITEMS,
+    INGREDIENTS,
+    ITEM_STATES,
+    MEAL_PLANS,
+    RECIPES,
+    SHOP_ORDERS,
+    SHOPS,
+    bump,
+    check_etag,
+    etag_for,
+    resource_versions,
 )
 
 router = APIRouter()
 
+SHOPPING_LIST_RESOURCES = (
+    MEAL_PLANS,
+    RECIPES,
+    INGREDIENTS,
+    CUSTOM_ITEMS,
+    ITEM_STATES,
+    SHOP_ORDERS,
+    SHOPS,
+)
+
+
+async def _shop_ids(session: AsyncSession, version: int) -> list[int]:
+    """Ids of all shops, in display order, from the reference cache.
+
+    `version` is the shops version the request has already read. Keying on it
+    means a shop added by another worker is a cache miss here, not a 404 until
+    the old entry expires.
+    """
+
+    async def load():
+        result = await session.execute(select(Shop.id).order_by(Shop.name))
+        return result.scalars().all()
+
+    return await reference_cache.get_or_load(f"shops:ids:{version}", (SHOPS,), load)
+
 
 def _round_amount(value: Decimal | None) -> Decimal | None:
     if value is None:
@@ -34,49 +79,26 @@ def _round_amount(value: Decimal | None) -> Decimal | None:
     return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
-@router.get("", response_model=ShoppingListResponse)
-async def get_shopping_list(
-    until_date: date | None = Query(default=None, alias="untilDate"),
-    shop_id: int | None = Query(default=None, alias="shopId"),
-    session: AsyncSession = Depends(get_session),
-):
-    if shop_id:
-        shop = await session.get(Shop, shop_id)
-        if not shop:
-            raise not_found("Shop")
-    last_date_result = await session.execute(select(MealPlan.date).order_by(MealPlan.date.desc()))
-    last_date = last_date_result.scalars().first()
+async def _resolve_window(
+    session: AsyncSession, from_date: date | None, until_date: date | None
+) -> tuple[date | None, date]:
     if until_date is None:
-        until_date = last_date or date.today()
-
-    plan_result = await session.execute(
-        select(MealPlan)
-        .where(MealPlan.date <= until_date)
-        .options(
-            selectinload(MealPlan.recipe)
-            .selectinload(Recipe.ingredients)
-            .selectinload(RecipeIngredient.ingredient)
+        planned = [await last_demand_date(session), await last_recurrence_date(session)]
+        until_date = max((day for day in planned if day), default=date.today())
+    if from_date and from_date > until_date:
+        raise bad_request("fromDate must not be after untilDate")
+    return from_date, until_date
+
+
+async def _build_items(
+    session: AsyncSession, from_date: date | None, until_date: date
+) -> list[ShoppingListItem]:
+    totals_result = await session.execute(
+        window_totals_select(
+            from_date, until_date, occurrence_demand_select(from_date, until_date)
         )
     )
-    plans = plan_result.scalars().all()
-
-    totals: dict[int, dict] = {}
-    for plan in plans:
-        recipe = plan.recipe
-        if not recipe:
-            continue
-        scale = Decimal(plan.people_count) / Decimal(recipe.people_amount)
-        for link in recipe.ingredients:
-            entry = totals.setdefault(
-                link.ingredient_id,
-                {
-                    "name": link.ingredient.name,
-                    "category": link.ingredient.category,
-                    "quantity": Decimal("0"),
-                    "unit": link.unit,
-                },
-            )
-            entry["quantity"] += Decimal(link.amount) * scale
+    totals = totals_result.all()
 
     custom_result = await session.execute(select(CustomShoppingItem).order_by(CustomShoppingItem.id))
     custom_items = custom_result.scalars().all()
@@ -85,15 +107,15 @@ async def get_shopping_list(
     states = {state.item_key: state.checked for state in state_result.scalars().all()}
 
     items: list[ShoppingListItem] = []
-    for ingredient_id, data in totals.items():
+    for ingredient_id, name, category, unit, quantity in totals:
         item_key = f"ingredient:{ingredient_id}"
         items.append(
             ShoppingListItem(
                 item_key=item_key,
-                name=data["name"],
-                category=data["category"],
-                quantity=_round_amount(data["quantity"]),
-                unit=data["unit"],
+                name=name,
+                category=category,
+                quantity=quantity,
+                unit=unit,
                 checked=states.get(item_key, False),
                 source="ingredient",
             )
@@ -112,15 +134,27 @@ async def get_shopping_list(
                 source="custom",
             )
         )
+    return items
 
-    if shop_id:
-        order_result = await session.execute(
-            select(ShopItemOrder).where(ShopItemOrder.shop_id == shop_id)
+
+async def _shop_order_maps(
+    session: AsyncSession, shop_ids: list[int], items: list[ShoppingListItem]
+) -> dict[int, dict[str, int]]:
+    order_maps: dict[int, dict[str, int]] = {shop_id: {} for shop_id in shop_ids}
+    if not shop_ids or not items:
+        return order_maps
+    result = await session.execute(
+        select(ShopItemOrder.shop_id, ShopItemOrder.item_key, ShopItemOrder.sort_order).where(
+            ShopItemOrder.shop_id.in_(shop_ids),
+            ShopItemOrder.item_key.in_([item.item_key for item in items]),
         )
-        order_map = {row.item_key: row.sort_order for row in order_result.scalars().all()}
-    else:
-        order_map = {}
+    )
+    for shop_id, item_key, sort_order in result.tuples():
+        order_maps[shop_id][item_key] = sort_order
+    return order_maps
+
 
+def _sort_key(order_map: dict[str, int]):
     def sort_key(item: ShoppingListItem):
         if item.checked:
             return (2, 0, item.category or "", item.name)
@@ -128,26 +162,115 @@ async def get_shopping_list(
             return (0, order_map[item.item_key], "", "")
         return (1, 0, item.category or "", item.name)
 
-    items.sort(key=sort_key)
+    return sort_key
+
+
+def _ordering(items: list[ShoppingListItem], order_map: dict[str, int]) -> list[int]:
+    key = _sort_key(order_map)
+    return sorted(range(len(items)), key=lambda idx: key(items[idx]))
+
+
+@router.get("", response_model=ShoppingListResponse)
+async def get_shopping_list(
+    request: Request,
+    response: Response,
+    from_date: date | None = Query(default=None, alias="fromDate"),
+    until_date: date | None = Query(default=None, alias="untilDate"),
+    shop_id: int | None = Query(default=None, alias="shopId"),
+    stream: StreamFormat | None = Query(default=None),
+    session: AsyncSession = Depends(get_read_session),
+):
+    today = date.today().isoformat() if until_date is None else ""
+    versions = await resource_versions(session, SHOPPING_LIST_RESOURCES)
+    if cached := check_etag(request, response, etag_for(request, versions, today)):
+        return cached
+    if shop_id and shop_id not in await _shop_ids(session, versions[SHOPS]):
+        raise not_found("Shop")
+    from_date, until_date = await _resolve_window(session, from_date, until_date)
+
+    items = await _build_items(session, from_date, until_date)
+    if shop_id:
+        order_map = (await _shop_order_maps(session, [shop_id], items))[shop_id]
+    else:
+        order_map = {}
+    items.sort(key=_sort_key(order_map))
 
-    return ShoppingListResponse(untilDate=until_date, items=items)
+    if stream:
+        envelope = ShoppingListResponse(fromDate=from_date, untilDate=until_date, items=[])
+        return stream_response(
+            iterate(items),
+            stream,
+            envelope=envelope.model_dump(mode="json", by_alias=True, exclude={"items"}),
+            headers=response.headers,
+        )
+    return ShoppingListResponse(fromDate=from_date, untilDate=until_date, items=items)
+
+
+@router.get("/by-shop", response_model=ShopsShoppingListResponse)
+async def get_shopping_list_by_shop(
+    request: Request,
+    response: Response,
+    from_date: date | None = Query(default=None, alias="fromDate"),
+    until_date: date | None = Query(default=None, alias="untilDate"),
+    shop_ids: list[int] | None = Query(default=None, alias="shopIds"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    today = date.today().isoformat() if until_date is None else ""
+    versions = await resource_versions(session, SHOPPING_LIST_RESOURCES)
+    if cached := check_etag(request, response, etag_for(request, versions, today)):
+        return cached
+    found = await _shop_ids(session, versions[SHOPS])
+    if shop_ids:
+        wanted = set(shop_ids)
+        found = [shop_id for shop_id in found if shop_id in wanted]
+    if shop_ids and len(found) != len(wanted):
+        raise not_found("Shop")
+    from_date, until_date = await _resolve_window(session, from_date, until_date)
+
+    items = await _build_items(session, from_date, until_date)
+    items.sort(key=_sort_key({}))
+    order_maps = await _shop_order_maps(session, found, items)
+    shops = [
+        ShopItemOrdering(shopId=shop_id, order=_ordering(items, order_maps[shop_id]))
+        for shop_id in found
+    ]
+    return ShopsShoppingListResponse(
+        fromDate=from_date, untilDate=until_date, items=items, shops=shops
+    )
+
+
+@router.get("/events")
+@no_compression
+async def shopping_list_events():
+    async def events():
+        yield f"retry: {HEARTBEAT_SECONDS * 1000}\n\n"
+        async for payload in broadcaster.subscribe():
+            yield ": keep-alive\n\n" if payload is None else f"data: {payload}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/custom-item", response_model=ShoppingListItem)
 async def add_custom_item(
     payload: CustomItemCreate, session: AsyncSession = Depends(get_session)
 ):
-    item = CustomShoppingItem(
-        name=payload.name,
-        category=payload.category,
-        quantity=payload.quantity,
-        unit=payload.unit,
-        checked=False,
+    result = await session.execute(
+        insert(CustomShoppingItem)
+        .values(
+            name=payload.name,
+            category=payload.category,
+            quantity=payload.quantity,
+            unit=payload.unit,
+            checked=False,
+        )
+        .returning(CustomShoppingItem)
     )
-    session.add(item)
-    await session.commit()
-    await session.refresh(item)
-    return ShoppingListItem(
+    item = result.scalar_one()
+    out = ShoppingListItem(
         item_key=f"custom:{item.id}",
         name=item.name,
         category=item.category,
@@ -156,58 +279,131 @@ async def add_custom_item(
         checked=item.checked,
         source="custom",
     )
+    await publish(session, {"type": "custom-item", "item": out.model_dump(mode="json")})
+    await bump(session, CUSTOM_ITEMS)
+    await session.commit()
+    return out
+
+
+def _split_item_keys(item_keys: list[str]) -> tuple[list[int], list[str]]:
+    custom_ids: list[int] = []
+    ingredient_keys: list[str] = []
+    for item_key in dict.fromkeys(item_keys):
+        kind, _, value = item_key.partition(":")
+        # isdecimal() alone also accepts digits from other scripts, such as "٣".
+        if kind not in ("custom", "ingredient") or not (value.isascii() and value.isdecimal()):
+            raise bad_request("Invalid item_key", {"item_key": item_key})
+        if kind == "custom":
+            custom_ids.append(int(value))
+        else:
+            ingredient_keys.append(item_key)
+    return custom_ids, ingredient_keys
+
+
+async def _set_checked(
+    session: AsyncSession, custom_ids: list[int], ingredient_keys: list[str], checked: bool
+) -> int:
+    changed: list[str] = []
+    if custom_ids:
+        result = await session.execute(
+            update(CustomShoppingItem)
+            .where(CustomShoppingItem.id.in_(custom_ids))
+            .values(checked=checked)
+            .returning(CustomShoppingItem.id)
+        )
+        matched = [f"custom:{item_id}" for item_id in result.scalars()]
+        if matched:
+            await bump(session, CUSTOM_ITEMS)
+        changed.extend(matched)
+    if ingredient_keys:
+        stmt = insert(ShoppingItemState).from_select(
+            ["item_key", "checked"],
+            select(func.unnest(literal(ingredient_keys, ARRAY(String))), literal(checked)),
+        )
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ShoppingItemState.item_key],
+                set_={"checked": stmt.excluded.checked},
+            )
+        )
+        changed.extend(ingredient_keys)
+        await bump(session, ITEM_STATES)
+    if changed:
+        await publish(session, {"type": "checked", "checked": checked, "itemKeys": changed})
+    return len(changed)
 
 
 @router.post("/toggle")
 async def toggle_item(payload: ToggleItemRequest, session: AsyncSession = Depends(get_session)):
-    if payload.item_key.startswith("custom:"):
-        item_id = int(payload.item_key.split(":")[1])
-        item = await session.get(CustomShoppingItem, item_id)
-        if not item:
-            raise not_found("Custom item")
-        item.checked = payload.checked
-        await session.commit()
-        return {"status": "updated"}
-    if not payload.item_key.startswith("ingredient:"):
-        raise bad_request("Invalid item_key")
-    state = await session.execute(
-        select(ShoppingItemState).where(ShoppingItemState.item_key == payload.item_key)
-    )
-    state_row = state.scalars().first()
-    if state_row:
-        state_row.checked = payload.checked
-    else:
-        session.add(ShoppingItemState(item_key=payload.item_key, checked=payload.checked))
+    custom_ids, ingredient_keys = _split_item_keys([payload.item_key])
+    updated = await _set_checked(session, custom_ids, ingredient_keys, payload.checked)
+    if not updated:
+        raise not_found("Custom item")
     await session.commit()
     return {"status": "updated"}
 
 
+@router.post("/toggle-bulk")
+async def toggle_items(payload: ToggleItemsRequest, session: AsyncSession = Depends(get_session)):
+    custom_ids, ingredient_keys = _split_item_keys(payload.item_keys)
+    updated = await _set_checked(session, custom_ids, ingredient_keys, payload.checked)
+    await session.commit()
+    return {"status": "updated", "updated": updated}
+
+
 @router.post("/learn-order")
 async def learn_order(payload: LearnOrderRequest, session: AsyncSession = Depends(get_session)):
     shop = await session.get(Shop, payload.shop_id)
     if not shop:
         raise not_found("Shop")
-    sequence = payload.item_keys
-    if not sequence:
+    if not payload.item_keys:
         raise bad_request("itemKeys must not be empty")
-    result = await session.execute(
-        select(ShopItemOrder).where(ShopItemOrder.shop_id == payload.shop_id)
-    )
-    existing = result.scalars().all()
-    existing_map = {row.item_key: row for row in existing}
-
-    for idx, item_key in enumerate(sequence, start=1):
-        if item_key in existing_map:
-            existing_map[item_key].sort_order = idx
-        else:
-            session.add(ShopItemOrder(shop_id=payload.shop_id, item_key=item_key, sort_order=idx))
-
-    remaining = [row for row in existing if row.item_key not in sequence]
-    if remaining:
-        max_order = len(sequence)
-        remaining_sorted = sorted(remaining, key=lambda row: row.sort_order)
-        for offset, row in enumerate(remaining_sorted, start=1):
-            row.sort_order = max_order + offset
+    sequence = list(dict.fromkeys(payload.item_keys))
 
+    seq = (
+        select(
+            func.unnest(literal(sequence, ARRAY(String)))
+            .table_valued("item_key", with_ordinality="position")
+            .render_derived()
+        )
+        .cte("seq")
+    )
+    existing = (
+        select(ShopItemOrder.item_key, ShopItemOrder.sort_order)
+        .where(ShopItemOrder.shop_id == payload.shop_id)
+        .cte("existing")
+    )
+    if payload.merge:
+        anchor = func.coalesce(
+            select(func.min(existing.c.sort_order))
+            .where(existing.c.item_key.in_(select(seq.c.item_key)))
+            .scalar_subquery(),
+            select(func.coalesce(func.max(existing.c.sort_order), 0) + 1).scalar_subquery(),
+        )
+    else:
+        anchor = literal(0)
+    rows = union_all(
+        select(seq.c.item_key, literal(1).label("block"), seq.c.position),
+        select(
+            existing.c.item_key,
+            case((existing.c.sort_order < anchor, 0), else_=2),
+            existing.c.sort_order,
+        ).where(existing.c.item_key.not_in(select(seq.c.item_key))),
+    ).subquery()
+    ranked = select(
+        literal(payload.shop_id),
+        rows.c.item_key,
+        func.row_number().over(order_by=(rows.c.block, rows.c.position, rows.c.item_key)),
+    )
+    stmt = insert(ShopItemOrder).from_select(["shop_id", "item_key", "sort_order"], ranked)
+    await session.execute(
+        stmt.on_conflict_do_update(
+            constraint="uq_shop_item",
+            set_={"sort_order": stmt.excluded.sort_order},
+            where=ShopItemOrder.sort_order.is_distinct_from(stmt.excluded.sort_order),
+        )
+    )
+    await publish(session, {"type": "order", "shopId": payload.shop_id})
+    await bump(session, SHOP_ORDERS)
     await session.commit()
     return {"status": "learned"}
@@ -1,32 +1,42 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_session
+from app.cache import cached_list
+from app.db import get_read_session, get_session
 from app.errors import bad_request, not_found
 from app.models import Shop
 from app.schemas import ShopCreate, ShopOut
+from app.versions import SHOP_ORDERS, SHOPS, bump
 
 router = APIRouter()
 
+SHOP_LIST = TypeAdapter(list[ShopOut])
+
 
 @router.get("", response_model=list[ShopOut])
-async def list_shops(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(Shop).order_by(Shop.name))
-    return result.scalars().all()
+async def list_shops(
+    request: Request, response: Response, session: AsyncSession = Depends(get_read_session)
+):
+    async def load():
+        result = await session.execute(select(Shop).order_by(Shop.name))
+        return [ShopOut.model_validate(item) for item in result.scalars()]
+
+    return await cached_list(request, response, session, (SHOPS,), load, SHOP_LIST)
 
 
 @router.post("", response_model=ShopOut)
 async def create_shop(payload: ShopCreate, session: AsyncSession = Depends(get_session)):
-    shop = Shop(name=payload.name)
-    session.add(shop)
     try:
+        result = await session.execute(insert(Shop).values(name=payload.name).returning(Shop))
+        shop = result.scalar_one()
+        await bump(session, SHOPS)
         await session.commit()
     except IntegrityError:
         await session.rollback()
         raise bad_request("Shop name must be unique")
-    await session.refresh(shop)
     return shop
 
 
@@ -36,5 +46,6 @@ async def delete_shop(shop_id: int, session: AsyncSession = Depends(get_session)
     if not shop:
         raise not_found("Shop")
     await session.delete(shop)
+    await bump(session, SHOPS, SHOP_ORDERS)
     await session.commit()
     return {"status": "deleted"}
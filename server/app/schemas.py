@@ -1,15 +1,23 @@
 from datetime import date
 from decimal import Decimal
-from typing import List, Optional
+from typing import Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel, Field
 
 
+T = TypeVar("T")
+
+
 class ErrorResponse(BaseModel):
     message: str
     details: Optional[dict] = None
 
 
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = Field(default=None, alias="nextCursor")
+
+
 class IngredientBase(BaseModel):
     name: str
     category: str
@@ -70,6 +78,49 @@ class RecipeOut(RecipeBase):
         populate_by_name = True
 
 
+class RecipeImportIngredient(BaseModel):
+    name: str = Field(min_length=1, max_length=200)
+    category: Optional[str] = Field(default=None, max_length=100)
+    amount: Decimal = Field(max_digits=10, decimal_places=2)
+    unit: str = Field(max_length=50)
+    sort_order: Optional[int] = None
+
+
+class RecipeImport(RecipeBase):
+    name: str = Field(min_length=1, max_length=200)
+    ingredients: List[RecipeImportIngredient]
+
+
+class RecipeImportError(BaseModel):
+    index: int
+    message: str
+    details: Optional[dict] = None
+
+
+class RecipeImportResult(BaseModel):
+    created: int
+    ids: List[int]
+    errors: List[RecipeImportError]
+
+
+class RecipeSummary(BaseModel):
+    id: int
+    name: str
+    people_amount: int = Field(alias="peopleAmount")
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+
+class CookableRecipe(BaseModel):
+    recipe: RecipeSummary
+    coverage: float
+    matched: int
+    total: int
+    missing_ingredient_ids: List[int] = Field(alias="missingIngredientIds")
+
+
 class MealTypeBase(BaseModel):
     name: str
 
@@ -105,7 +156,10 @@ class MealPlanUpdate(BaseModel):
 
 
 class MealPlanOut(MealPlanBase):
-    id: int
+    # Occurrences of a recurrence are expanded at read time and have no row of
+    # their own, so they carry recurrenceId instead of an id.
+    id: Optional[int] = None
+    recurrence_id: Optional[int] = Field(default=None, alias="recurrenceId")
     meal_type_name: str
     recipe_name: str
 
@@ -114,6 +168,65 @@ class MealPlanOut(MealPlanBase):
         populate_by_name = True
 
 
+class MealPlanRecurrenceBase(BaseModel):
+    meal_type_id: int = Field(alias="mealTypeId")
+    recipe_id: int = Field(alias="recipeId")
+    people_count: int = Field(alias="peopleCount")
+    weekdays: List[int] = Field(min_length=1)
+    start_date: date = Field(alias="startDate")
+    until_date: date = Field(alias="untilDate")
+
+
+class MealPlanRecurrenceCreate(MealPlanRecurrenceBase):
+    pass
+
+
+class MealPlanRecurrenceUpdate(MealPlanRecurrenceBase):
+    pass
+
+
+class MealPlanExceptionIn(BaseModel):
+    skip: bool = False
+    recipe_id: Optional[int] = Field(default=None, alias="recipeId")
+    people_count: Optional[int] = Field(default=None, alias="peopleCount")
+
+
+class MealPlanExceptionOut(MealPlanExceptionIn):
+    date: date
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+
+class MealPlanRecurrenceOut(MealPlanRecurrenceBase):
+    id: int
+    meal_type_name: str
+    recipe_name: str
+    exceptions: List[MealPlanExceptionOut]
+
+    class Config:
+        populate_by_name = True
+
+
+class MealPlanRange(BaseModel):
+    from_date: date = Field(alias="from")
+    to_date: date = Field(alias="to")
+
+
+class MealPlanCopy(MealPlanRange):
+    target_start: date = Field(alias="targetStart")
+
+
+class MealPlanShift(MealPlanRange):
+    days: int
+
+
+class MealPlanRangeResult(BaseModel):
+    status: str
+    count: int
+
+
 class ShopBase(BaseModel):
     name: str
 
@@ -147,20 +260,37 @@ class ShoppingListItem(BaseModel):
 
 
 class ShoppingListResponse(BaseModel):
+    from_date: Optional[date] = Field(default=None, alias="fromDate")
     until_date: date = Field(alias="untilDate")
     items: List[ShoppingListItem]
 
 
+class ShopItemOrdering(BaseModel):
+    shop_id: int = Field(alias="shopId")
+    order: List[int]
+
+
+class ShopsShoppingListResponse(ShoppingListResponse):
+    shops: List[ShopItemOrdering]
+
+
 class ToggleItemRequest(BaseModel):
     item_key: str
     checked: bool
 
 
+class ToggleItemsRequest(BaseModel):
+    item_keys: List[str]
+    checked: bool
+
+
 class LearnOrderRequest(BaseModel):
     shop_id: int = Field(alias="shopId")
     item_keys: List[str] = Field(alias="itemKeys")
+    merge: bool = False
 
 
 class ShoppingListQuery(BaseModel):
+    from_date: Optional[date] = Field(default=None, alias="fromDate")
     until_date: Optional[date] = Field(default=None, alias="untilDate")
     shop_id: Optional[int] = Field(default=None, alias="shopId")
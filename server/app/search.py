@@ -0,0 +1,122 @@
+from sqlalchemy import (
+    Float,
+    String,
+    and_,
+    cast,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB, REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models import Ingredient, Recipe, RecipeIngredient
+from app.pagination import DEFAULT_PAGE_SIZE, decode_cursor, encode_cursor
+
+SEARCH_CONFIG = "english"
+
+
+def _weighted(document, weight: str):
+    return func.setweight(document, literal_column(f"'{weight}'"))
+
+
+def search_document():
+    ingredient_names = (
+        select(func.string_agg(Ingredient.name, " "))
+        .join(RecipeIngredient, RecipeIngredient.ingredient_id == Ingredient.id)
+        .where(RecipeIngredient.recipe_id == Recipe.id)
+        .scalar_subquery()
+    )
+    parts = [
+        _weighted(func.to_tsvector(SEARCH_CONFIG, Recipe.name), "A"),
+        _weighted(func.to_tsvector(SEARCH_CONFIG, func.coalesce(ingredient_names, "")), "B"),
+        _weighted(func.to_tsvector(SEARCH_CONFIG, Recipe.description), "C"),
+        _weighted(
+            func.jsonb_to_tsvector(
+                literal(SEARCH_CONFIG, REGCONFIG), Recipe.steps, literal(["string"], JSONB)
+            ),
+            "D",
+        ),
+    ]
+    document = parts[0]
+    for part in parts[1:]:
+        document = document.op("||")(part)
+    return document
+
+
+async def refresh_search(session: AsyncSession, *criteria) -> None:
+    # search_vector spans recipe_ingredients and ingredients, so it cannot be a
+    # generated column; recipe and ingredient writes recompute it here instead.
+    await session.flush()
+    await session.execute(
+        update(Recipe)
+        .where(*criteria)
+        .values(search_vector=search_document())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _after(rank, key, cursor: list | None):
+    if cursor is None:
+        return []
+    last_rank, last_id = cursor
+    return [or_(rank < last_rank, and_(rank == last_rank, key > last_id))]
+
+
+def recipe_search_select(q: str, cursor: list | None, limit: int):
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    term = cast(literal(q), String)
+    rank = cast(
+        func.ts_rank_cd(Recipe.search_vector, query) + func.word_similarity(term, Recipe.name),
+        Float,
+    )
+    # The tsvector match uses the GIN index on search_vector and the trigram
+    # word match (`<%`) the gin_trgm_ops index on name, which catches typos.
+    matches = (
+        select(Recipe.id, rank.label("rank"))
+        .where(or_(Recipe.search_vector.op("@@")(query), term.op("<%")(Recipe.name)))
+        .subquery()
+    )
+    return (
+        select(Recipe, matches.c.rank)
+        .join(matches, matches.c.id == Recipe.id)
+        .options(selectinload(Recipe.ingredients).selectinload(RecipeIngredient.ingredient))
+        .where(*_after(matches.c.rank, matches.c.id, cursor))
+        .order_by(matches.c.rank.desc(), matches.c.id)
+        .limit(limit + 1)
+    )
+
+
+def ingredient_search_select(q: str, cursor: list | None, limit: int):
+    term = cast(literal(q), String)
+    rank = cast(func.word_similarity(term, Ingredient.name), Float)
+    matches = (
+        select(Ingredient.id, rank.label("rank"))
+        .where(or_(term.op("<%")(Ingredient.name), Ingredient.name.icontains(q, autoescape=True)))
+        .subquery()
+    )
+    return (
+        select(Ingredient, matches.c.rank)
+        .join(matches, matches.c.id == Ingredient.id)
+        .where(*_after(matches.c.rank, matches.c.id, cursor))
+        .order_by(matches.c.rank.desc(), matches.c.id)
+        .limit(limit + 1)
+    )
+
+
+async def search(
+    session: AsyncSession, build, q: str, cursor: str | None, limit: int | None
+) -> tuple[list, str | None]:
+    limit = limit or DEFAULT_PAGE_SIZE
+    after = decode_cursor(cursor, [float, int]) if cursor is not None else None
+    result = await session.execute(build(q, after, limit))
+    rows = result.all()
+    items = [row[0] for row in rows[:limit]]
+    if len(rows) <= limit:
+        return items, None
+    last, rank = rows[limit - 1]
+    return items, encode_cursor([rank, last.id])
@@ -0,0 +1,64 @@
+import json
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Mapping
+from typing import Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.db import ReadSessionLocal
+
+StreamFormat = Literal["ndjson", "json"]
+
+STREAM_BATCH_SIZE = 500
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+async def stream_scalars(stmt, convert: Callable[..., BaseModel]) -> AsyncIterator[BaseModel]:
+    # The request-scoped session is closed before a streaming body is sent, so the
+    # cursor gets a session of its own that lives as long as the response.
+    async with ReadSessionLocal() as session:
+        result = await session.stream_scalars(
+            stmt.execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async for row in result:
+            yield convert(row)
+
+
+async def iterate(items: Iterable[BaseModel]) -> AsyncIterator[BaseModel]:
+    for item in items:
+        yield item
+
+
+async def _ndjson(items: AsyncIterable[BaseModel]) -> AsyncIterator[str]:
+    async for item in items:
+        yield item.model_dump_json(by_alias=True) + "\n"
+
+
+async def _json_array(
+    items: AsyncIterable[BaseModel], envelope: dict | None, field: str
+) -> AsyncIterator[str]:
+    if envelope is None:
+        yield "["
+    else:
+        head = json.dumps(envelope)[:-1]
+        yield f'{head}{", " if envelope else ""}"{field}": ['
+    first = True
+    async for item in items:
+        yield ("" if first else ",") + item.model_dump_json(by_alias=True)
+        first = False
+    yield "]" if envelope is None else "]}"
+
+
+def stream_response(
+    items: AsyncIterable[BaseModel],
+    fmt: StreamFormat,
+    envelope: dict | None = None,
+    field: str = "items",
+    headers: Mapping[str, str] | None = None,
+) -> StreamingResponse:
+    if fmt == "ndjson":
+        body = _ndjson(items)
+    else:
+        body = _json_array(items, envelope, field)
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt], headers=headers)
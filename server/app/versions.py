@@ -0,0 +1,99 @@
+from hashlib import sha1
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ResourceVersion
+
+INGREDIENTS = "ingredients"
+RECIPES = "recipes"
+MEAL_TYPES = "meal_types"
+MEAL_PLANS = "meal_plans"
+SHOPS = "shops"
+CUSTOM_ITEMS = "custom_items"
+ITEM_STATES = "item_states"
+SHOP_ORDERS = "shop_orders"
+
+BUMPED = "bumped_resources"
+
+ALL_RESOURCES = (
+    INGREDIENTS,
+    RECIPES,
+    MEAL_TYPES,
+    MEAL_PLANS,
+    SHOPS,
+    CUSTOM_ITEMS,
+    ITEM_STATES,
+    SHOP_ORDERS,
+)
+
+
+async def bump(session: AsyncSession, *resources: str) -> dict[str, int]:
+    stmt = insert(ResourceVersion).values(
+        [{"name": name, "version": 1} for name in sorted(set(resources))]
+    )
+    result = await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ResourceVersion.name],
+            set_={"version": ResourceVersion.version + 1},
+        ).returning(ResourceVersion.name, ResourceVersion.version)
+    )
+    versions = dict(result.tuples().all())
+    # Remembered on the session so in-process caches can drop these resources
+    # once the transaction commits (see app.cache).
+    session.info.setdefault(BUMPED, {}).update(versions)
+    return versions
+
+
+async def current_version(session: AsyncSession, resource: str) -> int:
+    result = await session.execute(
+        select(ResourceVersion.version).where(ResourceVersion.name == resource)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+def _matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def resource_versions(session: AsyncSession, resources: tuple[str, ...]) -> dict[str, int]:
+    result = await session.execute(
+        select(ResourceVersion.name, ResourceVersion.version).where(
+            ResourceVersion.name.in_(resources)
+        )
+    )
+    versions = dict(result.tuples().all())
+    return {name: versions.get(name, 0) for name in resources}
+
+
+def etag_for(request: Request, versions: dict[str, int], extra: str = "") -> str:
+    token = ",".join(f"{name}={versions[name]}" for name in sorted(versions))
+    digest = sha1(f"{request.url.path}?{request.url.query}|{token}|{extra}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Response | None:
+    # Always weak: the tag tracks resource versions rather than bytes, and
+    # compression would weaken it on a 200 but cannot see the empty 304, so a
+    # strong tag there would not match the one the client holds.
+    headers = {"ETag": f"W/{etag}", "Cache-Control": "no-cache"}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+async def not_modified(
+    request: Request,
+    response: Response,
+    session: AsyncSession,
+    resources: tuple[str, ...],
+    extra: str = "",
+) -> Response | None:
+    versions = await resource_versions(session, resources)
+    return check_etag(request, response, etag_for(request, versions, extra))
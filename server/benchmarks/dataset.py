@@ -0,0 +1,171 @@
+import json
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.db import AsyncSessionLocal, engine
+from app.demand import rebuild_demand
+from app.search import refresh_search
+from app.versions import ALL_RESOURCES, bump
+
+CATEGORIES = ["Produce", "Meat", "Dairy", "Pantry", "Bakery", "Frozen", "Spices", "Drinks"]
+UNITS = ["g", "ml", "pcs", "tbsp", "cup"]
+MEAL_TYPES = ["Breakfast", "Morning snack", "Lunch", "Afternoon snack", "Dinner", "Evening snack"]
+
+TABLES = [
+    "shop_item_orders",
+    "shopping_item_states",
+    "custom_shopping_items",
+    "meal_plan_exceptions",
+    "meal_plan_recurrences",
+    "meal_plans",
+    "recipe_ingredients",
+    "recipes",
+    "meal_types",
+    "shops",
+    "ingredients",
+    "ingredient_demand",
+    "ingredient_demand_cumulative",
+]
+
+
+@dataclass(frozen=True)
+class DatasetSize:
+    name: str
+    recipes: int
+    plans: int
+    shops: int
+
+    @property
+    def ingredients(self) -> int:
+        return max(50, min(5000, self.recipes // 5))
+
+    @property
+    def days(self) -> int:
+        return max(30, min(3 * 365, self.plans // len(MEAL_TYPES)))
+
+
+PRESETS = {
+    "small": DatasetSize("small", recipes=500, plans=5_000, shops=5),
+    "medium": DatasetSize("medium", recipes=2_000, plans=100_000, shops=20),
+    "large": DatasetSize("large", recipes=10_000, plans=1_000_000, shops=50),
+}
+
+
+def parse_size(spec: str) -> DatasetSize:
+    if spec in PRESETS:
+        return PRESETS[spec]
+    recipes, plans, shops = (int(part) for part in spec.split(":"))
+    return DatasetSize(spec, recipes=recipes, plans=plans, shops=shops)
+
+
+async def generate(size: DatasetSize, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=size.days // 2)
+
+    async with engine.connect() as connection:
+        raw = await connection.get_raw_connection()
+        conn = raw.driver_connection
+        await conn.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+
+        await conn.copy_records_to_table(
+            "ingredients",
+            columns=["id", "name", "category"],
+            records=(
+                (idx, f"Ingredient {idx}", rng.choice(CATEGORIES))
+                for idx in range(1, size.ingredients + 1)
+            ),
+        )
+        await conn.copy_records_to_table(
+            "meal_types",
+            columns=["id", "name"],
+            records=list(enumerate(MEAL_TYPES, start=1)),
+        )
+        await conn.copy_records_to_table(
+            "recipes",
+            columns=["id", "name", "description", "people_amount", "steps"],
+            records=(
+                (
+                    idx,
+                    f"Recipe {idx}",
+                    f"Generated recipe number {idx}.",
+                    rng.randint(1, 6),
+                    json.dumps([f"Step {step}" for step in range(1, rng.randint(2, 8))]),
+                )
+                for idx in range(1, size.recipes + 1)
+            ),
+        )
+
+        def recipe_links():
+            for recipe_id in range(1, size.recipes + 1):
+                picked = rng.sample(range(1, size.ingredients + 1), rng.randint(1, 10))
+                for order, ingredient_id in enumerate(picked, start=1):
+                    amount = Decimal(rng.randint(1, 50_000)) / 100
+                    yield (recipe_id, ingredient_id, amount, rng.choice(UNITS), order)
+
+        await conn.copy_records_to_table(
+            "recipe_ingredients",
+            columns=["recipe_id", "ingredient_id", "amount", "unit", "sort_order"],
+            records=recipe_links(),
+        )
+        await conn.copy_records_to_table(
+            "meal_plans",
+            columns=["id", "date", "meal_type_id", "recipe_id", "people_count"],
+            records=(
+                (
+                    idx,
+                    start + timedelta(days=rng.randrange(size.days)),
+                    rng.randint(1, len(MEAL_TYPES)),
+                    rng.randint(1, size.recipes),
+                    rng.randint(1, 6),
+                )
+                for idx in range(1, size.plans + 1)
+            ),
+        )
+        await conn.copy_records_to_table(
+            "shops",
+            columns=["id", "name"],
+            records=[(idx, f"Shop {idx}") for idx in range(1, size.shops + 1)],
+        )
+
+        def learned_orders():
+            keys = [f"ingredient:{idx}" for idx in range(1, size.ingredients + 1)]
+            for shop_id in range(1, size.shops + 1):
+                sample = rng.sample(keys, min(len(keys), 300))
+                for order, item_key in enumerate(sample, start=1):
+                    yield (shop_id, item_key, order)
+
+        await conn.copy_records_to_table(
+            "shop_item_orders",
+            columns=["shop_id", "item_key", "sort_order"],
+            records=learned_orders(),
+        )
+        await conn.copy_records_to_table(
+            "shopping_item_states",
+            columns=["item_key", "checked"],
+            records=(
+                (f"ingredient:{idx}", rng.random() < 0.3)
+                for idx in range(1, size.ingredients + 1, 3)
+            ),
+        )
+        await conn.copy_records_to_table(
+            "custom_shopping_items",
+            columns=["name", "category", "quantity", "unit", "checked"],
+            records=[(f"Custom {idx}", rng.choice(CATEGORIES), None, None, False) for idx in range(20)],
+        )
+        for table in ("ingredients", "meal_types", "recipes", "meal_plans", "shops"):
+            await conn.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT MAX(id) FROM {table}))"
+            )
+        await connection.commit()
+
+    async with AsyncSessionLocal() as session:
+        await rebuild_demand(session)
+        await refresh_search(session)
+        await bump(session, *ALL_RESOURCES)
+        await session.commit()
+    async with engine.connect() as connection:
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.execute("ANALYZE")
@@ -0,0 +1,211 @@
+"""Micro-benchmarks for the server hot paths.
+
+Each dataset size TRUNCATEs every application table and reloads it with
+synthetic data, so point DB_NAME at a scratch database and pass --reset:
+
+    python -m benchmarks.run --reset --sizes small,medium --output bench.json
+
+Sizes are presets (small, medium, large) or recipes:plans:shops triples.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.cache import reference_cache
+from app.db import AsyncSessionLocal, engine
+from app.main import app
+from app.models import Recipe, RecipeIngredient
+from app.routers.recipes import _recipe_to_out
+from app.versions import INGREDIENTS
+from benchmarks.dataset import generate, parse_size
+
+
+async def call(method: str, path: str, query: str = "", body: dict | None = None) -> bytes:
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"bench")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    chunks: list[bytes] = []
+    status: list[int] = []
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    if status[0] >= 400:
+        raise RuntimeError(f"{method} {path}?{query} returned {status[0]}")
+    return b"".join(chunks)
+
+
+def endpoint(method: str, path: str, query: str = "", body: dict | None = None):
+    async def run():
+        await call(method, path, query, body)
+
+    return run
+
+
+def uncached_endpoint(method: str, path: str, resources: tuple[str, ...], query: str = ""):
+    # Drops the reference cache entries first, so every run renders the list
+    # from the database rather than replaying the cached body.
+    async def run():
+        reference_cache.invalidate(resources)
+        await call(method, path, query)
+
+    return run
+
+
+def learn_order_bench(item_keys: list[str]):
+    # Rotating the order by one each call moves every key, so each run has
+    # rows to rewrite; repeating the same order would leave nothing to do.
+    calls = 0
+
+    async def run():
+        nonlocal calls
+        calls += 1
+        shift = calls % len(item_keys)
+        body = {"shopId": 1, "itemKeys": item_keys[shift:] + item_keys[:shift]}
+        await call("POST", "/shopping-list/learn-order", body=body)
+
+    return run
+
+
+async def recipe_to_out_bench():
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Recipe)
+            .options(selectinload(Recipe.ingredients).selectinload(RecipeIngredient.ingredient))
+            .order_by(Recipe.name)
+        )
+        recipes = result.scalars().all()
+
+    async def run():
+        for recipe in recipes:
+            _recipe_to_out(recipe)
+
+    return run
+
+
+async def benchmarks() -> dict:
+    today = date.today()
+    week = f"fromDate={today.isoformat()}&untilDate={(today + timedelta(days=6)).isoformat()}"
+    learned = [f"ingredient:{idx}" for idx in range(1, 51)]
+    return {
+        "shopping_list": endpoint("GET", "/shopping-list"),
+        "shopping_list_week": endpoint("GET", "/shopping-list", week),
+        "shopping_list_shop": endpoint("GET", "/shopping-list", "shopId=1"),
+        "shopping_list_by_shop": endpoint("GET", "/shopping-list/by-shop"),
+        "recipe_to_out": await recipe_to_out_bench(),
+        "list_recipes": endpoint("GET", "/recipes"),
+        "list_meal_plans": endpoint("GET", "/meal-plans"),
+        "list_ingredients": uncached_endpoint("GET", "/ingredients", (INGREDIENTS,)),
+        "list_ingredients_cached": endpoint("GET", "/ingredients"),
+        "search_recipes": endpoint("GET", "/recipes/search", "q=ingredient+7"),
+        "learn_order": learn_order_bench(learned),
+    }
+
+
+async def measure(fn, runs: int, warmup: int) -> list[float]:
+    for _ in range(warmup):
+        await fn()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> dict:
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "results": [],
+    }
+    only = set(args.only.split(",")) if args.only else None
+    for spec in args.sizes.split(","):
+        size = parse_size(spec)
+        print(f"generating {size}", file=sys.stderr)
+        started = time.perf_counter()
+        await generate(size, seed=args.seed)
+        print(f"generated in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        for name, fn in (await benchmarks()).items():
+            if only and name not in only:
+                continue
+            timings = await measure(fn, args.runs, args.warmup)
+            result = {
+                "benchmark": name,
+                "size": size.name,
+                "recipes": size.recipes,
+                "plans": size.plans,
+                "shops": size.shops,
+                "runs": len(timings),
+                "min_ms": round(min(timings), 3),
+                "median_ms": round(statistics.median(timings), 3),
+                "mean_ms": round(statistics.fmean(timings), 3),
+                "max_ms": round(max(timings), 3),
+            }
+            report["results"].append(result)
+            print(f"{size.name:>8} {name:<20} median {result['median_ms']:>10.3f} ms", file=sys.stderr)
+    await engine.dispose()
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="small", help="comma-separated presets or R:P:S")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument(
+        "--reset", action="store_true", help="confirm that all tables may be truncated"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.reset:
+        sys.exit("refusing to truncate the database without --reset")
+    report = asyncio.run(main(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
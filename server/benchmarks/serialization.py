@@ -0,0 +1,158 @@
+"""CPU cost of encoding list responses: response_model path vs FAST_JSON.
+
+Builds detached ORM rows in memory, so no database is needed:
+
+    python -m benchmarks.serialization --items 10000 --runs 5
+
+For each list route it times the default path (build the *Out models,
+re-validate them through the route's response_model, encode with
+JSONResponse) against the fast path (plain dicts encoded by orjson), using
+process CPU time, and checks both produce the same JSON.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.fastjson import FastJSONResponse
+from app.main import app
+from app.models import Ingredient, MealPlan, MealType, Recipe, RecipeIngredient
+from app.routers.meal_plans import _plan_to_json, _plan_to_out
+from app.routers.recipes import _recipe_to_json, _recipe_to_out
+
+
+def recipes(count: int) -> list[Recipe]:
+    ingredients = [
+        Ingredient(id=idx, name=f"Ingredient {idx}", category="Pantry") for idx in range(1, 201)
+    ]
+    rows = []
+    for idx in range(1, count + 1):
+        recipe = Recipe(
+            id=idx,
+            name=f"Recipe {idx}",
+            description=f"Generated recipe number {idx}.",
+            people_amount=idx % 6 + 1,
+            steps=[f"Step {step}" for step in range(1, 5)],
+        )
+        recipe.ingredients = [
+            RecipeIngredient(
+                ingredient_id=ingredient.id,
+                ingredient=ingredient,
+                amount=Decimal(idx * 7 % 50_000) / 100,
+                unit="g",
+                sort_order=order,
+            )
+            for order, ingredient in enumerate(ingredients[idx % 190 : idx % 190 + 6], start=1)
+        ]
+        rows.append(recipe)
+    return rows
+
+
+def meal_plans(count: int) -> list[MealPlan]:
+    meal_type = MealType(id=1, name="Dinner")
+    recipe = Recipe(id=1, name="Recipe 1")
+    start = date(2024, 1, 1)
+    return [
+        MealPlan(
+            id=idx,
+            date=start + timedelta(days=idx % 365),
+            meal_type_id=1,
+            meal_type=meal_type,
+            recipe_id=1,
+            recipe=recipe,
+            people_count=idx % 6 + 1,
+        )
+        for idx in range(1, count + 1)
+    ]
+
+
+def response_field(path: str):
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == path and "GET" in route.methods:
+            return route.response_field
+    raise LookupError(path)
+
+
+def default_path(path: str, to_out):
+    field = response_field(path)
+
+    def run(rows) -> bytes:
+        content = asyncio.run(
+            serialize_response(field=field, response_content=[to_out(row) for row in rows])
+        )
+        return JSONResponse(content).body
+
+    return run
+
+
+def fast_path(to_json):
+    def run(rows) -> bytes:
+        return FastJSONResponse([to_json(row) for row in rows]).body
+
+    return run
+
+
+def measure(fn, rows, runs: int) -> list[float]:
+    fn(rows)
+    timings = []
+    for _ in range(runs):
+        started = time.process_time()
+        fn(rows)
+        timings.append((time.process_time() - started) * 1000)
+    return timings
+
+
+def main(args: argparse.Namespace) -> dict:
+    cases = {
+        "list_recipes": (
+            recipes(args.items),
+            default_path("/recipes", _recipe_to_out),
+            fast_path(_recipe_to_json),
+        ),
+        "list_meal_plans": (
+            meal_plans(args.items),
+            default_path("/meal-plans", _plan_to_out),
+            fast_path(_plan_to_json),
+        ),
+    }
+    results = []
+    for name, (rows, default, fast) in cases.items():
+        if json.loads(default(rows)) != json.loads(fast(rows)):
+            sys.exit(f"{name}: fast path JSON differs from the response_model output")
+        default_ms = statistics.median(measure(default, rows, args.runs))
+        fast_ms = statistics.median(measure(fast, rows, args.runs))
+        per_10k = 10_000 / args.items
+        result = {
+            "benchmark": name,
+            "items": args.items,
+            "default_cpu_ms_per_10k": round(default_ms * per_10k, 3),
+            "fast_cpu_ms_per_10k": round(fast_ms * per_10k, 3),
+            "saved_cpu_ms_per_10k": round((default_ms - fast_ms) * per_10k, 3),
+            "speedup": round(default_ms / fast_ms, 2),
+        }
+        results.append(result)
+        print(
+            f"{name:<16} default {result['default_cpu_ms_per_10k']:>9.1f} ms"
+            f"  fast {result['fast_cpu_ms_per_10k']:>8.1f} ms"
+            f"  saved {result['saved_cpu_ms_per_10k']:>9.1f} ms per 10k items",
+            file=sys.stderr,
+        )
+    return {"results": results}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=5)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(main(parse_args()), indent=2))
@@ -0,0 +1,37 @@
+import argparse
+import asyncio
+import sys
+
+from app.db import AsyncSessionLocal
+from app.importer import IMPORT_BATCH_SIZE, ImportFileError, import_recipes, parse_rows
+
+
+async def run(path: str, fmt: str, batch_size: int) -> int:
+    with open(path, "rb") as handle:
+        try:
+            rows, errors = parse_rows(handle.read(), fmt)
+        except ImportFileError as exc:
+            print(f"{path}: {exc}", file=sys.stderr)
+            return 1
+    created = 0
+    for start in range(0, len(rows), batch_size):
+        async with AsyncSessionLocal() as session:
+            result = await import_recipes(session, rows[start : start + batch_size])
+            await session.commit()
+        created += result.created
+        errors.extend(result.errors)
+    for error in sorted(errors, key=lambda error: error.index):
+        details = f" {error.details}" if error.details else ""
+        print(f"row {error.index}: {error.message}{details}", file=sys.stderr)
+    print(f"imported {created} recipe(s), {len(errors)} row(s) rejected")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import recipes from JSON or NDJSON")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["json", "ndjson"], help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "json")
+    sys.exit(asyncio.run(run(args.path, fmt, args.batch_size)))
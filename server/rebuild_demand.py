@@ -0,0 +1,15 @@
+import asyncio
+
+from app.db import AsyncSessionLocal
+from app.demand import rebuild_demand
+
+
+async def rebuild():
+    async with AsyncSessionLocal() as session:
+        drift = await rebuild_demand(session)
+        await session.commit()
+    print(f"ingredient_demand reconciled, {drift} row(s) were out of date")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
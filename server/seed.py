@@ -5,6 +5,9 @@ from decimal import Decimal
 from sqlalchemy import delete
 
 from app.db import AsyncSessionLocal
+from app.demand import rebuild_demand
+from app.search import refresh_search
+from app.versions import ALL_RESOURCES, bump
 from app.models import (
     CustomShoppingItem,
     Ingredient,
@@ -137,6 +140,11 @@ async def seed():
 
         await session.commit()
 
+        await rebuild_demand(session)
+        await refresh_search(session)
+        await bump(session, *ALL_RESOURCES)
+        await session.commit()
+
 
 if __name__ == "__main__":
     asyncio.run(seed())
@@ -0,0 +1,109 @@
+"""Tests run the app in process against the database configured by DB_*.
+
+Each test creates the rows it needs under unique names and deletes them
+again, so the suite can share a development database.
+"""
+from datetime import date
+from decimal import Decimal
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from app.db import engine, read_engine
+from app.main import app
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    # Pooled connections belong to this test's event loop.
+    await engine.dispose()
+    await read_engine.dispose()
+
+
+@pytest.fixture
+def unique():
+    def unique(prefix: str) -> str:
+        return f"{prefix} {uuid4().hex[:12]}"
+
+    return unique
+
+
+async def _post(client, path: str, payload: dict) -> dict:
+    response = await client.post(path, json=payload)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture
+async def kitchen(client, unique):
+    """An ingredient of its own and a meal type, removed with their plans."""
+    ingredient = await _post(client, "/ingredients", {"name": unique("Salt"), "category": "Test"})
+    meal_type = await _post(client, "/meal-types", {"name": unique("Dinner")})
+    recipes = []
+
+    async def recipe(people_amount: int, amount: str) -> int:
+        created = await _post(
+            client,
+            "/recipes",
+            {
+                "name": unique("Recipe"),
+                "description": "",
+                "peopleAmount": people_amount,
+                "steps": [],
+                "ingredients": [
+                    {
+                        "ingredient_id": ingredient["id"],
+                        "amount": amount,
+                        "unit": "g",
+                        "sort_order": 1,
+                    }
+                ],
+            },
+        )
+        recipes.append(created["id"])
+        return created["id"]
+
+    async def plan(day: date, recipe_id: int, people_count: int) -> dict:
+        return await _post(
+            client,
+            "/meal-plans",
+            {
+                "date": day.isoformat(),
+                "mealTypeId": meal_type["id"],
+                "recipeId": recipe_id,
+                "peopleCount": people_count,
+            },
+        )
+
+    async def quantity(until: date, since: date | None = None) -> Decimal | None:
+        # Nothing else uses the kitchen's ingredient, so other plans don't count.
+        params = {"untilDate": until.isoformat()}
+        if since is not None:
+            params["fromDate"] = since.isoformat()
+        response = await client.get("/shopping-list", params=params)
+        assert response.status_code == 200, response.text
+        items = {item["item_key"]: item for item in response.json()["items"]}
+        item = items.get(f"ingredient:{ingredient['id']}")
+        return None if item is None else Decimal(item["quantity"])
+
+    yield {
+        "ingredient_id": ingredient["id"],
+        "meal_type_id": meal_type["id"],
+        "recipe": recipe,
+        "plan": plan,
+        "quantity": quantity,
+    }
+    # Deleting the meal type cascades to its plans and recurrences.
+    await client.delete(f"/meal-types/{meal_type['id']}")
+    for recipe_id in recipes:
+        await client.delete(f"/recipes/{recipe_id}")
+    await client.delete(f"/ingredients/{ingredient['id']}")
@@ -0,0 +1,129 @@
+import pytest
+
+import app.cache
+from app.cache import TTLCache, reference_cache
+from app.db import AsyncSessionLocal
+from app.versions import MEAL_TYPES, bump, resource_versions
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_the_ttl():
+    clock = Clock()
+    cache = TTLCache(maxsize=8, ttl=30, clock=clock)
+    cache.set("key", ("shops",), "value", cache._generation(("shops",)))
+
+    clock.now = 29.9
+    assert cache.get("key") == (True, "value")
+    clock.now = 30
+    assert cache.get("key") == (False, None)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=30)
+    for key in ("a", "b"):
+        cache.set(key, ("shops",), key, cache._generation(("shops",)))
+    cache.get("a")
+    cache.set("c", ("shops",), "c", cache._generation(("shops",)))
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, "a")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_drops_only_entries_tagged_with_the_resource():
+    cache = TTLCache(maxsize=8, ttl=30)
+    cache.set("shops", ("shops",), 1, cache._generation(("shops",)))
+    cache.set("both", ("shops", "recipes"), 2, cache._generation(("shops", "recipes")))
+    cache.set("recipes", ("recipes",), 3, cache._generation(("recipes",)))
+
+    cache.invalidate(["shops"])
+
+    assert cache.get("shops") == (False, None)
+    assert cache.get("both") == (False, None)
+    assert cache.get("recipes") == (True, 3)
+
+
+async def test_value_loaded_across_an_invalidation_is_not_kept():
+    cache = TTLCache(maxsize=8, ttl=30)
+
+    async def load():
+        # A write to shops commits while the value is being read.
+        cache.invalidate(["shops"])
+        return "maybe stale"
+
+    assert await cache.get_or_load("key", ("shops",), load) == "maybe stale"
+    assert cache.get("key") == (False, None)
+
+
+async def test_commit_invalidates_the_cached_list(client, unique):
+    await client.get("/meal-types")
+    assert reference_cache.get("/meal-types?")[0]
+
+    response = await client.post("/meal-types", json={"name": unique("Brunch")})
+    assert response.status_code == 200, response.text
+    created = response.json()
+    try:
+        assert not reference_cache.get("/meal-types?")[0]
+        response = await client.get("/meal-types")
+        assert created["id"] in [item["id"] for item in response.json()]
+    finally:
+        await client.delete(f"/meal-types/{created['id']}")
+
+
+async def test_rolled_back_bump_keeps_the_cached_list(client):
+    await client.get("/meal-types")
+
+    async with AsyncSessionLocal() as session:
+        await bump(session, MEAL_TYPES)
+        await session.rollback()
+
+    assert reference_cache.get("/meal-types?")[0]
+
+
+async def test_values_older_than_a_committed_version_are_not_kept():
+    cache = TTLCache(maxsize=8, ttl=30)
+    cache.committed({"shops": 4})
+
+    async def load():
+        return "stale"
+
+    def keep(value):
+        return not cache.behind({"shops": 3})
+
+    assert await cache.get_or_load("key", ("shops",), load, keep=keep) == "stale"
+    assert cache.get("key") == (False, None)
+    assert not cache.behind({"shops": 4})
+
+
+async def test_list_read_from_a_lagging_replica_is_not_cached(client, unique, monkeypatch):
+    response = await client.post("/meal-types", json={"name": unique("Brunch")})
+    assert response.status_code == 200, response.text
+    created = response.json()
+    try:
+        # The replica has not applied the create yet: it reports the version
+        # before the one this worker just committed.
+        async def lagging(session, resources):
+            versions = await resource_versions(session, resources)
+            return {name: version - 1 for name, version in versions.items()}
+
+        monkeypatch.setattr(app.cache, "resource_versions", lagging)
+        await client.get("/meal-types")
+        found, _ = reference_cache.get("/meal-types?")
+        assert not found
+
+        monkeypatch.setattr(app.cache, "resource_versions", resource_versions)
+        response = await client.get("/meal-types")
+        assert created["id"] in [item["id"] for item in response.json()]
+        found, _ = reference_cache.get("/meal-types?")
+        assert found
+    finally:
+        await client.delete(f"/meal-types/{created['id']}")
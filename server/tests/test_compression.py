@@ -0,0 +1,121 @@
+import gzip
+import zlib
+
+import pytest
+
+from app.compression import CompressionMiddleware, no_compression
+
+pytestmark = pytest.mark.anyio
+
+BODY = b'{"items": [' + b", ".join(b'{"id": %d}' % n for n in range(200)) + b"]}"
+
+
+def _app(chunks: list[bytes], content_type: str = "application/json", endpoint=None):
+    async def app(scope, receive, send):
+        if endpoint is not None:
+            scope["endpoint"] = endpoint
+        headers = [(b"content-type", content_type.encode())]
+        if len(chunks) == 1:
+            headers.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for index, chunk in enumerate(chunks):
+            more_body = index < len(chunks) - 1
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    return app
+
+
+async def _call(app, accept_encoding: str | None, **options) -> list[dict]:
+    middleware = CompressionMiddleware(app, minimum_size=64, **options)
+    headers = [] if accept_encoding is None else [(b"accept-encoding", accept_encoding.encode())]
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return sent
+
+
+def _headers(sent: list[dict]) -> dict[str, str]:
+    return {name.decode(): value.decode() for name, value in sent[0]["headers"]}
+
+
+def _body(sent: list[dict]) -> bytes:
+    return b"".join(message.get("body", b"") for message in sent[1:])
+
+
+@pytest.mark.parametrize(
+    "accept_encoding", ["gzip", "br, gzip;q=0.5", "deflate, GZIP", "*;q=0, gzip;q=1"]
+)
+async def test_gzip_is_used_when_accepted(accept_encoding):
+    sent = await _call(_app([BODY]), accept_encoding)
+
+    headers = _headers(sent)
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(_body(sent))
+    assert gzip.decompress(_body(sent)) == BODY
+
+
+@pytest.mark.parametrize("accept_encoding", [None, "", "identity", "gzip;q=0", "br"])
+async def test_body_is_sent_as_is_unless_gzip_is_accepted(accept_encoding):
+    sent = await _call(_app([BODY]), accept_encoding)
+
+    assert "content-encoding" not in _headers(sent)
+    assert _body(sent) == BODY
+
+
+async def test_brotli_is_preferred_when_enabled():
+    brotli = pytest.importorskip("brotli")
+    sent = await _call(_app([BODY]), "gzip, br", brotli_enabled=True)
+
+    assert _headers(sent)["content-encoding"] == "br"
+    assert brotli.decompress(_body(sent)) == BODY
+
+
+async def test_small_bodies_are_not_compressed():
+    sent = await _call(_app([b"[]"]), "gzip")
+
+    headers = _headers(sent)
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert _body(sent) == b"[]"
+
+
+@pytest.mark.parametrize("content_type", ["image/png", "text/event-stream"])
+async def test_excluded_types_are_not_compressed(content_type):
+    sent = await _call(_app([BODY], content_type), "gzip")
+
+    assert "content-encoding" not in _headers(sent)
+    assert _body(sent) == BODY
+
+
+async def test_routes_can_opt_out():
+    @no_compression
+    async def endpoint():
+        pass
+
+    sent = await _call(_app([BODY], endpoint=endpoint), "gzip")
+
+    assert "content-encoding" not in _headers(sent)
+    assert _body(sent) == BODY
+
+
+async def test_streamed_chunks_decode_as_they_arrive():
+    chunks = [b'{"id": %d}\n' % n for n in range(3)]
+    sent = await _call(_app(chunks + [b""], "application/x-ndjson"), "gzip")
+
+    headers = _headers(sent)
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    decoder = zlib.decompressobj(31)
+    # Each chunk is complete on arrival; nothing waits for the next one.
+    for chunk, message in zip(chunks, sent[1:]):
+        assert decoder.decompress(message["body"]) == chunk
+    assert decoder.decompress(sent[-1]["body"]) == b""
+    assert decoder.eof
@@ -0,0 +1,32 @@
+from app.cookable import CookableIndex
+
+
+def _index(links: dict[int, list[int]]) -> CookableIndex:
+    index = CookableIndex()
+    for recipe_id, ingredient_ids in links.items():
+        index._add(recipe_id, ingredient_ids)
+    index._version = 1
+    return index
+
+
+def test_matches_survive_the_recipe_leaving_the_index():
+    index = _index({1: [10, 11, 12], 2: [10]})
+    matches = index.query({10, 12})
+
+    # Another request deletes recipe 1 while this one awaits the summaries.
+    index.apply(1, None, 2)
+
+    by_recipe = {match.recipe_id: match for match in matches}
+    assert by_recipe[1].missing({10, 12}) == [11]
+    assert (by_recipe[1].matched, by_recipe[1].total) == (2, 3)
+
+
+def test_matches_keep_their_ingredients_when_a_slot_is_reused():
+    index = _index({1: [10, 11]})
+    matches = index.query({10})
+
+    index.apply(1, None, 2)
+    index.apply(3, [20, 21, 22], 3)
+
+    assert matches[0].recipe_id == 1
+    assert matches[0].missing({10}) == [11]
@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+START = date(2090, 1, 1)
+
+# (day offset, recipe peopleAmount, ingredient amount, peopleCount) per plan.
+# Each case totals exactly on a half cent. Dividing plan by plan would leave
+# it a hair below, and it would round down.
+HALF_CENT_CASES = {
+    "thirds_same_day": [(0, 3, "0.01", 1)] * 3 + [(0, 2, "0.01", 1)],
+    "thirds_across_days": [(day, 3, "0.01", 1) for day in range(3)] + [(3, 2, "0.01", 1)],
+    "two_thirds_to_18_985": [(day, 3, "9.49", 2) for day in range(3)] + [(4, 2, "0.01", 1)],
+    "sevenths": [(day, 7, "0.01", 1) for day in range(7)] + [(0, 2, "29.99", 1)],
+}
+
+
+def expected_total(plans) -> Decimal:
+    exact = sum(
+        Fraction(Decimal(amount)) * people_count / people_amount
+        for _, people_amount, amount, people_count in plans
+    )
+    quotient = Decimal(exact.numerator) / Decimal(exact.denominator)
+    return quotient.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+@pytest.mark.parametrize("plans", HALF_CENT_CASES.values(), ids=HALF_CENT_CASES.keys())
+async def test_half_cent_totals_round_half_up(kitchen, plans):
+    recipes = {}
+    for offset, people_amount, amount, people_count in plans:
+        key = (people_amount, amount)
+        if key not in recipes:
+            recipes[key] = await kitchen["recipe"](people_amount, amount)
+        await kitchen["plan"](START + timedelta(days=offset), recipes[key], people_count)
+
+    until = START + timedelta(days=max(plan[0] for plan in plans))
+    assert await kitchen["quantity"](until) == expected_total(plans)
+
+
+async def test_window_counts_only_plans_inside_it(kitchen):
+    recipe = await kitchen["recipe"](2, "3.00")
+    for offset in (0, 2, 5):
+        await kitchen["plan"](START + timedelta(days=offset), recipe, 1)
+    quantity = kitchen["quantity"]
+
+    assert await quantity(START + timedelta(days=2), since=START + timedelta(days=1)) == Decimal(
+        "1.50"
+    )
+    assert await quantity(START + timedelta(days=5), since=START) == Decimal("4.50")
+    assert await quantity(START + timedelta(days=4), since=START + timedelta(days=3)) is None
+
+
+async def test_window_from_the_first_representable_date(kitchen):
+    recipe = await kitchen["recipe"](1, "2.00")
+    await kitchen["plan"](START, recipe, 1)
+
+    assert await kitchen["quantity"](START, since=date.min) == Decimal("2.00")
+
+
+async def test_recurring_half_cent_total_rounds_half_up(client, kitchen):
+    thirds = await kitchen["recipe"](3, "0.01")
+    halves = await kitchen["recipe"](2, "0.01")
+    response = await client.post(
+        "/meal-plan-recurrences",
+        json={
+            "mealTypeId": kitchen["meal_type_id"],
+            "recipeId": thirds,
+            "peopleCount": 1,
+            "weekdays": list(range(1, 8)),
+            "startDate": START.isoformat(),
+            "untilDate": (START + timedelta(days=2)).isoformat(),
+        },
+    )
+    assert response.status_code == 200, response.text
+    await kitchen["plan"](START, halves, 1)
+
+    assert await kitchen["quantity"](START + timedelta(days=2)) == Decimal("0.02")
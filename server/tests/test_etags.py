@@ -0,0 +1,27 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip", "identity"])
+async def test_304_repeats_the_validator_of_the_200(client, accept_encoding):
+    headers = {"Accept-Encoding": accept_encoding}
+    params = {"untilDate": "2090-12-31"}
+    response = await client.get("/shopping-list", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    revalidated = await client.get(
+        "/shopping-list", params=params, headers={**headers, "If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+
+
+async def test_strong_form_of_the_tag_still_matches(client):
+    response = await client.get("/meal-types")
+    etag = response.headers["etag"]
+
+    revalidated = await client.get("/meal-types", headers={"If-None-Match": etag[2:]})
+    assert revalidated.status_code == 304
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def _recipe(name: str, ingredient: str, category: str | None = "Test") -> dict:
+    return {
+        "name": name,
+        "description": "",
+        "peopleAmount": 2,
+        "steps": ["Mix"],
+        "ingredients": [{"name": ingredient, "category": category, "amount": "1.50", "unit": "g"}],
+    }
+
+
+@pytest.fixture
+async def cleanup(client):
+    recipe_ids: list[int] = []
+    ingredient_names: list[str] = []
+    yield recipe_ids, ingredient_names
+    for recipe_id in recipe_ids:
+        await client.delete(f"/recipes/{recipe_id}")
+    ingredients = (await client.get("/ingredients")).json()
+    for ingredient in ingredients:
+        if ingredient["name"] in ingredient_names:
+            await client.delete(f"/ingredients/{ingredient['id']}")
+
+
+async def test_import_creates_valid_rows_and_reports_the_rest(client, unique, cleanup):
+    recipe_ids, ingredient_names = cleanup
+    ingredient = unique("Saffron")
+    ingredient_names.append(ingredient)
+    rows = [
+        _recipe(unique("Paella"), ingredient),
+        {"name": "No fields"},
+        _recipe(unique("Risotto"), unique("Unknown"), category=None),
+        _recipe(unique("Tea"), ingredient),
+    ]
+
+    response = await client.post("/recipes/import", json=rows)
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    recipe_ids.extend(result["ids"])
+    assert result["created"] == 2
+    assert [error["index"] for error in result["errors"]] == [1, 2]
+    for recipe_id, row in zip(result["ids"], (rows[0], rows[3])):
+        recipe = (await client.get(f"/recipes/{recipe_id}")).json()
+        assert recipe["name"] == row["name"]
+        assert recipe["ingredients"][0]["ingredient_name"] == ingredient
+
+
+async def test_ndjson_lines_are_reported_by_position(client, unique, cleanup):
+    recipe_ids, ingredient_names = cleanup
+    ingredient = unique("Saffron")
+    ingredient_names.append(ingredient)
+    body = "\n".join([json.dumps(_recipe(unique("Paella"), ingredient)), "{not json", ""])
+
+    response = await client.post(
+        "/recipes/import", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    recipe_ids.extend(result["ids"])
+    assert result["created"] == 1
+    assert [error["index"] for error in result["errors"]] == [1]
+
+
+@pytest.mark.parametrize("body", ["{not json", '{"name": "one recipe"}', "[1, 2"])
+async def test_unreadable_json_files_are_bad_requests(client, body):
+    response = await client.post(
+        "/recipes/import", content=body, headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 400, response.text
+    assert response.json()["message"]
@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import select
+
+from app.db import engine
+from app.models import ShopItemOrder
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def shop_id(client, unique):
+    response = await client.post("/shops", json={"name": unique("Market")})
+    assert response.status_code == 200, response.text
+    shop_id = response.json()["id"]
+    yield shop_id
+    # Learned orders go with the shop.
+    await client.delete(f"/shops/{shop_id}")
+
+
+async def _learn(client, shop_id: int, keys: list[str], merge: bool = False) -> None:
+    response = await client.post(
+        "/shopping-list/learn-order", json={"shopId": shop_id, "itemKeys": keys, "merge": merge}
+    )
+    assert response.status_code == 200, response.text
+
+
+async def _order(shop_id: int) -> list[tuple[str, int]]:
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            select(ShopItemOrder.item_key, ShopItemOrder.sort_order)
+            .where(ShopItemOrder.shop_id == shop_id)
+            .order_by(ShopItemOrder.sort_order)
+        )
+        return [tuple(row) for row in result]
+
+
+def _keys(*names: str) -> list[str]:
+    return [f"custom:{name}" for name in names]
+
+
+async def test_learned_order_replaces_and_keeps_the_rest_after_it(client, shop_id):
+    await _learn(client, shop_id, _keys("1", "2", "3"))
+    assert await _order(shop_id) == list(zip(_keys("1", "2", "3"), range(1, 4)))
+
+    await _learn(client, shop_id, _keys("3", "1"))
+    assert await _order(shop_id) == list(zip(_keys("3", "1", "2"), range(1, 4)))
+
+
+async def test_repeated_keys_count_once(client, shop_id):
+    await _learn(client, shop_id, _keys("1", "2", "1"))
+    assert await _order(shop_id) == list(zip(_keys("1", "2"), range(1, 3)))
+
+
+async def test_merge_places_the_sequence_at_its_first_known_key(client, shop_id):
+    await _learn(client, shop_id, _keys("1", "2", "3", "4"))
+
+    await _learn(client, shop_id, _keys("4", "2"), merge=True)
+
+    # "1" was ahead of the earliest learned key and stays there; the rest
+    # follow the merged run in their old order.
+    assert await _order(shop_id) == list(zip(_keys("1", "4", "2", "3"), range(1, 5)))
+
+
+async def test_merge_of_unknown_keys_appends_them(client, shop_id):
+    await _learn(client, shop_id, _keys("1", "2"))
+
+    await _learn(client, shop_id, _keys("8", "9"), merge=True)
+
+    assert await _order(shop_id) == list(zip(_keys("1", "2", "8", "9"), range(1, 5)))
+
+
+async def test_learn_order_rejects_empty_sequences_and_unknown_shops(client, shop_id):
+    response = await client.post(
+        "/shopping-list/learn-order", json={"shopId": shop_id, "itemKeys": []}
+    )
+    assert response.status_code == 400
+    response = await client.post(
+        "/shopping-list/learn-order", json={"shopId": 2_000_000_000, "itemKeys": _keys("1")}
+    )
+    assert response.status_code == 404
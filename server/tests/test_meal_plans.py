@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("days", [10**7, -(10**7), 10**12, 3_000_000])
+async def test_shift_out_of_date_range_is_a_bad_request(client, days):
+    response = await client.post(
+        "/meal-plans/shift", json={"from": "2090-01-01", "to": "2090-01-31", "days": days}
+    )
+    assert response.status_code == 400, response.text
+
+
+async def test_copy_past_the_last_date_is_a_bad_request(client):
+    response = await client.post(
+        "/meal-plans/copy",
+        json={"from": "2090-01-01", "to": "2090-01-31", "targetStart": "9999-12-20"},
+    )
+    assert response.status_code == 400, response.text
+
+
+async def test_copy_within_range_still_succeeds(client):
+    response = await client.post(
+        "/meal-plans/copy",
+        json={"from": "2091-01-01", "to": "2091-01-31", "targetStart": "9999-12-01"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["count"] == 0
+
+
+# Range routes act on every plan in the range, so these tests keep to days
+# no other test plans on.
+DAY = date(2093, 3, 1)
+
+
+def _day(offset: int) -> date:
+    return DAY + timedelta(days=offset)
+
+
+async def _range(client, path: str, first: int, last: int, **extra) -> dict:
+    payload = {"from": _day(first).isoformat(), "to": _day(last).isoformat(), **extra}
+    response = await client.post(f"/meal-plans/{path}", json=payload)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def _planned(client, kitchen) -> list[tuple[str, int, int]]:
+    response = await client.get(
+        "/meal-plans", params={"from": _day(0).isoformat(), "to": _day(30).isoformat()}
+    )
+    assert response.status_code == 200, response.text
+    return sorted(
+        (plan["date"], plan["recipeId"], plan["peopleCount"])
+        for plan in response.json()
+        if plan["mealTypeId"] == kitchen["meal_type_id"]
+    )
+
+
+async def test_copy_repeats_the_range_from_the_target(client, kitchen):
+    recipe = await kitchen["recipe"](2, "1.00")
+    await kitchen["plan"](_day(0), recipe, 2)
+    await kitchen["plan"](_day(2), recipe, 4)
+
+    copied = await _range(client, "copy", 0, 2, targetStart=_day(10).isoformat())
+
+    assert copied == {"status": "copied", "count": 2}
+    assert await _planned(client, kitchen) == [
+        (_day(0).isoformat(), recipe, 2),
+        (_day(2).isoformat(), recipe, 4),
+        (_day(10).isoformat(), recipe, 2),
+        (_day(12).isoformat(), recipe, 4),
+    ]
+    assert await kitchen["quantity"](_day(12), since=_day(10)) == Decimal("3.00")
+
+
+async def test_shift_moves_plans_and_their_demand(client, kitchen):
+    recipe = await kitchen["recipe"](1, "2.00")
+    await kitchen["plan"](_day(0), recipe, 1)
+    await kitchen["plan"](_day(1), recipe, 1)
+    await kitchen["plan"](_day(3), recipe, 1)
+
+    shifted = await _range(client, "shift", 0, 1, days=5)
+
+    assert shifted == {"status": "shifted", "count": 2}
+    assert [plan[0] for plan in await _planned(client, kitchen)] == [
+        _day(3).isoformat(),
+        _day(5).isoformat(),
+        _day(6).isoformat(),
+    ]
+    assert await kitchen["quantity"](_day(1), since=_day(0)) is None
+    assert await kitchen["quantity"](_day(6), since=_day(5)) == Decimal("4.00")
+
+
+async def test_clear_removes_only_the_range(client, kitchen):
+    recipe = await kitchen["recipe"](1, "2.00")
+    for offset in (0, 1, 3):
+        await kitchen["plan"](_day(offset), recipe, 1)
+
+    cleared = await _range(client, "clear", 0, 1)
+
+    assert cleared == {"status": "cleared", "count": 2}
+    assert await _planned(client, kitchen) == [(_day(3).isoformat(), recipe, 1)]
+    assert await kitchen["quantity"](_day(3), since=_day(0)) == Decimal("2.00")
+
+
+async def test_shift_by_zero_days_changes_nothing(client, kitchen):
+    recipe = await kitchen["recipe"](1, "2.00")
+    await kitchen["plan"](_day(0), recipe, 1)
+
+    assert await _range(client, "shift", 0, 0, days=0) == {"status": "shifted", "count": 0}
+    assert await _planned(client, kitchen) == [(_day(0).isoformat(), recipe, 1)]
+
+
+@pytest.mark.parametrize(
+    "path, extra", [("copy", {"targetStart": "2093-04-01"}), ("shift", {"days": 1}), ("clear", {})]
+)
+async def test_reversed_range_is_a_bad_request(client, path, extra):
+    payload = {"from": _day(2).isoformat(), "to": _day(0).isoformat(), **extra}
+    response = await client.post(f"/meal-plans/{path}", json=payload)
+    assert response.status_code == 400, response.text
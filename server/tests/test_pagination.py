@@ -0,0 +1,58 @@
+import base64
+import json
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def _walk(client, path: str, limit: int) -> list[dict]:
+    items, cursor = [], None
+    while True:
+        params = {"limit": limit}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = await client.get(path, params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= limit
+        items.extend(page["items"])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return items
+        assert len(page["items"]) == limit
+
+
+@pytest.mark.parametrize("path", ["/ingredients", "/recipes"])
+async def test_pages_cover_the_list_once_in_order(client, path):
+    full = (await client.get(path)).json()
+
+    paged = await _walk(client, path, limit=3)
+
+    assert [item["id"] for item in paged] == [item["id"] for item in full]
+
+
+async def test_meal_plan_pages_follow_date_then_id(client):
+    full = (await client.get("/meal-plans")).json()
+
+    paged = await _walk(client, "/meal-plans", limit=500)
+
+    expected = sorted(full, key=lambda plan: (plan["date"], plan["id"]))
+    assert [plan["id"] for plan in paged] == [plan["id"] for plan in expected]
+
+
+def _token(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "cursor", ["not base64!", _token({"name": "x"}), _token(["x"]), _token(["x", "y"])]
+)
+async def test_malformed_cursors_are_bad_requests(client, cursor):
+    response = await client.get("/ingredients", params={"cursor": cursor})
+    assert response.status_code == 400, response.text
+
+
+async def test_paged_lists_cannot_be_streamed(client):
+    response = await client.get("/ingredients", params={"limit": 5, "stream": "ndjson"})
+    assert response.status_code == 400, response.text
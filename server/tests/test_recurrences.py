@@ -0,0 +1,111 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+# A Monday, so weekday n of the first week is _day(n - 1).
+MONDAY = date(2094, 3, 1)
+EVERY_DAY = list(range(1, 8))
+
+
+def _day(offset: int) -> date:
+    return MONDAY + timedelta(days=offset)
+
+
+async def _recurrence(
+    client, kitchen, recipe_id: int, weekdays: list[int], first: int, last: int
+) -> dict:
+    response = await client.post(
+        "/meal-plan-recurrences",
+        json={
+            "mealTypeId": kitchen["meal_type_id"],
+            "recipeId": recipe_id,
+            "peopleCount": 1,
+            "weekdays": weekdays,
+            "startDate": _day(first).isoformat(),
+            "untilDate": _day(last).isoformat(),
+        },
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def _occurrences(client, kitchen, first: int, last: int) -> list[tuple[date, int, int]]:
+    response = await client.get(
+        "/meal-plans", params={"from": _day(first).isoformat(), "to": _day(last).isoformat()}
+    )
+    assert response.status_code == 200, response.text
+    return [
+        (date.fromisoformat(plan["date"]), plan["recipeId"], plan["peopleCount"])
+        for plan in response.json()
+        if plan["mealTypeId"] == kitchen["meal_type_id"] and plan["recurrenceId"] is not None
+    ]
+
+
+async def test_occurrences_fall_on_the_chosen_weekdays(client, kitchen):
+    recipe = await kitchen["recipe"](1, "1.00")
+    await _recurrence(client, kitchen, recipe, [1, 3], 0, 13)
+
+    days = [day for day, _, _ in await _occurrences(client, kitchen, 0, 20)]
+
+    assert days == [_day(0), _day(2), _day(7), _day(9)]
+    assert await kitchen["quantity"](_day(20), since=_day(0)) == Decimal("4.00")
+
+
+@pytest.mark.parametrize(
+    "first, last, expected",
+    [
+        (5, 20, range(5, 10)),
+        (-5, 2, range(0, 3)),
+        (9, 9, range(9, 10)),
+        (10, 20, range(0)),
+        (-10, -1, range(0)),
+    ],
+    ids=["tail", "head", "until_date", "after", "before"],
+)
+async def test_windows_expand_only_their_overlap(client, kitchen, first, last, expected):
+    recipe = await kitchen["recipe"](1, "1.00")
+    await _recurrence(client, kitchen, recipe, EVERY_DAY, 0, 9)
+
+    days = [day for day, _, _ in await _occurrences(client, kitchen, first, last)]
+
+    assert days == [_day(offset) for offset in expected]
+
+
+async def test_exceptions_skip_or_override_occurrences(client, kitchen):
+    recipe = await kitchen["recipe"](1, "1.00")
+    other = await kitchen["recipe"](2, "1.00")
+    recurrence = await _recurrence(client, kitchen, recipe, EVERY_DAY, 0, 2)
+    path = f"/meal-plan-recurrences/{recurrence['id']}/exceptions"
+
+    skipped = await client.put(f"{path}/{_day(1).isoformat()}", json={"skip": True})
+    assert skipped.status_code == 200, skipped.text
+    overridden = await client.put(
+        f"{path}/{_day(2).isoformat()}", json={"recipeId": other, "peopleCount": 3}
+    )
+    assert overridden.status_code == 200, overridden.text
+
+    assert await _occurrences(client, kitchen, 0, 2) == [(_day(0), recipe, 1), (_day(2), other, 3)]
+    # 1.00 for the plain occurrence, 1.00 * 3 / 2 for the override.
+    assert await kitchen["quantity"](_day(2), since=_day(0)) == Decimal("2.50")
+
+    restored = await client.delete(f"{path}/{_day(1).isoformat()}")
+    assert restored.status_code == 200, restored.text
+    assert [day for day, _, _ in await _occurrences(client, kitchen, 0, 2)] == [
+        _day(0),
+        _day(1),
+        _day(2),
+    ]
+
+
+async def test_exception_off_the_schedule_is_a_bad_request(client, kitchen):
+    recipe = await kitchen["recipe"](1, "1.00")
+    recurrence = await _recurrence(client, kitchen, recipe, [1], 0, 13)
+
+    response = await client.put(
+        f"/meal-plan-recurrences/{recurrence['id']}/exceptions/{_day(1).isoformat()}",
+        json={"skip": True},
+    )
+    assert response.status_code == 400, response.text
@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db import engine
+from app.models import CustomShoppingItem, ResourceVersion, Shop
+from app.versions import SHOPS
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def custom_item(client, unique):
+    response = await client.post("/shopping-list/custom-item", json={"name": unique("Foil")})
+    assert response.status_code == 200, response.text
+    item = response.json()
+    yield item
+    # Custom items have no delete route.
+    async with engine.begin() as conn:
+        item_id = int(item["item_key"].partition(":")[2])
+        await conn.execute(delete(CustomShoppingItem).where(CustomShoppingItem.id == item_id))
+
+
+async def _items(client) -> dict[str, dict]:
+    response = await client.get("/shopping-list")
+    assert response.status_code == 200, response.text
+    return {item["item_key"]: item for item in response.json()["items"]}
+
+
+async def test_bulk_toggle_checks_custom_and_ingredient_items(client, custom_item):
+    key = custom_item["item_key"]
+    response = await client.post(
+        "/shopping-list/toggle-bulk", json={"item_keys": [key, key], "checked": True}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["updated"] == 1
+    assert (await _items(client))[key]["checked"] is True
+
+    response = await client.post("/shopping-list/toggle", json={"item_key": key, "checked": False})
+    assert response.status_code == 200, response.text
+    assert (await _items(client))[key]["checked"] is False
+
+
+@pytest.mark.parametrize(
+    "item_key", ["custom:٣", "ingredient:²", "custom:", "custom:-1", "recipe:1", "7"]
+)
+async def test_malformed_item_keys_are_bad_requests(client, item_key):
+    response = await client.post(
+        "/shopping-list/toggle-bulk", json={"item_keys": [item_key], "checked": True}
+    )
+    assert response.status_code == 400, response.text
+
+
+async def test_toggling_a_missing_custom_item_leaves_the_etag_alone(client):
+    etag = (await client.get("/shopping-list")).headers["etag"]
+
+    response = await client.post(
+        "/shopping-list/toggle-bulk", json={"item_keys": ["custom:2000000000"], "checked": True}
+    )
+    assert response.json()["updated"] == 0
+    response = await client.post(
+        "/shopping-list/toggle", json={"item_key": "custom:2000000000", "checked": True}
+    )
+    assert response.status_code == 404
+
+    response = await client.get("/shopping-list", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+async def _create_shop_elsewhere(name: str) -> int:
+    # A Core connection fires no Session commit hooks, so this process's
+    # cache is not told about the write, as with a commit from another worker.
+    async with engine.begin() as conn:
+        result = await conn.execute(insert(Shop).values(name=name).returning(Shop.id))
+        await conn.execute(
+            pg_insert(ResourceVersion)
+            .values(name=SHOPS, version=1)
+            .on_conflict_do_update(
+                index_elements=[ResourceVersion.name],
+                set_={"version": ResourceVersion.version + 1},
+            )
+        )
+        return result.scalar_one()
+
+
+async def test_shop_created_by_another_worker_is_found(client, unique):
+    response = await client.post("/shops", json={"name": unique("Shop")})
+    assert response.status_code == 200, response.text
+    known = response.json()["id"]
+    created = None
+    try:
+        # Warm the cached shop list.
+        response = await client.get("/shopping-list", params={"shopId": known})
+        assert response.status_code == 200, response.text
+
+        created = await _create_shop_elsewhere(unique("Shop"))
+
+        response = await client.get("/shopping-list", params={"shopId": created})
+        assert response.status_code == 200, response.text
+        response = await client.get("/shopping-list/by-shop", params={"shopIds": created})
+        assert response.status_code == 200, response.text
+        assert [shop["shopId"] for shop in response.json()["shops"]] == [created]
+    finally:
+        for shop_id in (known, created):
+            if shop_id is not None:
+                await client.delete(f"/shops/{shop_id}")